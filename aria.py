@@ -1,6 +1,9 @@
 import requests
 import re
 
+from m3u_parser import iter_entries
+from upstream import upstream_url
+
 PLAYLIST_URL = "https://theariatv.github.io/aria.m3u"
 
 ALLOWED_COUNTRIES = [
@@ -20,7 +23,7 @@ COUNTRY_ALIASES = {
 }
 
 def fetch_playlist(url):
-    r = requests.get(url)
+    r = requests.get(upstream_url(url))
     r.raise_for_status()
     return r.text.splitlines()
 
@@ -43,35 +46,23 @@ def force_group_title(line, country):
 
 def parse_and_filter(lines):
     output_lines = ["#EXTM3U"]
-    keep_channel = False
-    current_country = ""
-
-    for line in lines:
-        if line.startswith("#EXTINF"):
-            country_match = re.search(r'group-title="([^"]+)"', line)
-            country_text = country_match.group(1) if country_match else ""
-
-            # Also include channel name in search
-            title_text = line.split(",", 1)[1] if "," in line else ""
-            search_area = (country_text + " " + title_text).lower()
-
-            matched_country = ""
-            for c, aliases in COUNTRY_ALIASES.items():
-                if any(alias.lower() in search_area for alias in aliases):
-                    matched_country = c
-                    break
-
-            if matched_country:
-                line = force_group_title(line, matched_country)
-                output_lines.append(line)
-                keep_channel = True
-                current_country = matched_country
-            else:
-                keep_channel = False
-                current_country = ""
-        elif line.startswith("http"):
-            if keep_channel:
-                output_lines.append(line)
+
+    for entry in iter_entries(lines):
+        country_text = entry.group_title
+
+        # Also include channel name in search
+        search_area = (country_text + " " + entry.title).lower()
+
+        matched_country = ""
+        for c, aliases in COUNTRY_ALIASES.items():
+            if any(alias.lower() in search_area for alias in aliases):
+                matched_country = c
+                break
+
+        if matched_country:
+            output_lines.append(force_group_title(entry.extinf, matched_country))
+            if entry.url.startswith("http"):
+                output_lines.append(entry.url)
 
     return "\n".join(output_lines)
 
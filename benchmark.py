@@ -0,0 +1,224 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from m3u_parser import iter_entries
+
+# Checked-in playlists used as a fixed corpus; missing files are skipped
+CORPUS_FILES = [
+    "TheTVApp.m3u8",
+    "MergedCleanPlaylist.m3u8",
+    "LGTV.m3u8",
+    "DrewAll.m3u8",
+    "DaddyLiveRAW.m3u8",
+    "TVPass.m3u",
+]
+BASELINE_FILE = "benchmark_baseline.json"
+ROUNDS = 5
+# Relative slowdown in throughput, or growth in peak memory, reported as a regression
+REGRESSION_THRESHOLD = 0.25
+
+def load_corpus(files=CORPUS_FILES):
+    corpus = {}
+    for path in files:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                corpus[path] = f.read()
+    return corpus
+
+def corpus_bytes(corpus, paths=None):
+    return sum(len(corpus[p].encode("utf-8")) for p in (paths or corpus))
+
+def corpus_entries(corpus):
+    return {path: list(iter_entries(text)) for path, text in corpus.items()}
+
+# Each setup takes the corpus and returns (run, items, bytes): run is timed,
+# items and bytes are the work one call of run does.
+
+def setup_parse_playlist(corpus):
+    from merge_engine import parse_playlist
+
+    sources = {path: text.splitlines() for path, text in corpus.items()}
+    items = sum(len(v) for v in corpus_entries(corpus).values())
+
+    def run():
+        for path, lines in sources.items():
+            parse_playlist(lines, path)
+
+    return run, items, corpus_bytes(corpus)
+
+def setup_is_nsfw(corpus):
+    from merge_engine import is_nsfw
+
+    entries = [e for run in corpus_entries(corpus).values() for e in run]
+
+    def run():
+        for e in entries:
+            is_nsfw(e.extinf, e.headers, e.url)
+
+    return run, len(entries), corpus_bytes(corpus)
+
+def setup_write_merged(corpus):
+    from merge_engine import PlaylistSink
+    from playlist_writer import merge_sorted_runs, sort_run
+
+    runs = [sort_run(entries) for entries in corpus_entries(corpus).values()]
+    items = sum(len(r) for r in runs)
+    out_dir = tempfile.TemporaryDirectory()
+
+    def run():
+        sink = PlaylistSink(os.path.join(out_dir.name, "MergedPlaylist.m3u8"), "merged", lambda rule: True)
+        sink.open(None)
+        for entry in merge_sorted_runs(runs):
+            sink.write(entry, None)
+        sink.close()
+
+    return run, items, corpus_bytes(corpus)
+
+def setup_convert_m3u8_entry(corpus):
+    from convert_m3u8 import convert_m3u8_entry
+
+    texts = list(corpus.values())
+    items = sum(len(t.splitlines()) for t in texts)
+
+    def run():
+        for text in texts:
+            convert_m3u8_entry(text)
+
+    return run, items, corpus_bytes(corpus)
+
+def setup_append_new_streams(corpus):
+    from tv import append_new_streams
+
+    path = "TheTVApp.m3u8"
+    lines = corpus[path].splitlines()
+    new_urls = [(e.url, e.group_title, e.title) for e in iter_entries(lines)]
+
+    def run():
+        append_new_streams(list(lines), new_urls)
+
+    return run, len(new_urls), corpus_bytes(corpus, [path])
+
+def setup_tvpass_update_playlist(corpus):
+    from tvpass import update_playlist
+
+    local = [(e.extinf, e.url) for e in iter_entries(corpus["TVPass.m3u"])]
+    upstream = [(e.extinf, e.url) for e in iter_entries(corpus["TheTVApp.m3u8"])]
+
+    def run():
+        update_playlist(local, upstream)
+
+    return run, len(local) + len(upstream), corpus_bytes(corpus, ["TVPass.m3u", "TheTVApp.m3u8"])
+
+CASES = {
+    "parse_playlist": setup_parse_playlist,
+    "is_nsfw": setup_is_nsfw,
+    "write_merged": setup_write_merged,
+    "convert_m3u8_entry": setup_convert_m3u8_entry,
+    "append_new_streams": setup_append_new_streams,
+    "tvpass_update_playlist": setup_tvpass_update_playlist,
+}
+
+def measure(run, rounds=ROUNDS):
+    """Best-of-N wall time, then one extra call under tracemalloc for peak memory."""
+    best = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+def run_cases(names, corpus, rounds=ROUNDS):
+    results = {}
+    for name in names:
+        try:
+            run, items, size = CASES[name](corpus)
+        except ImportError as e:
+            print(f"⏭️ {name}: skipped ({e})")
+            continue
+        except KeyError as e:
+            print(f"⏭️ {name}: skipped (corpus file {e} missing)")
+            continue
+        seconds, peak = measure(run, rounds)
+        results[name] = {
+            "seconds": round(seconds, 6),
+            "items": items,
+            "items_per_s": round(items / seconds, 1),
+            "mb_per_s": round(size / 1024 / 1024 / seconds, 2),
+            "peak_kb": round(peak / 1024, 1),
+        }
+        r = results[name]
+        print(f"⏱️ {name}: {seconds * 1000:.1f} ms | {r['items_per_s']:,.0f} items/s | "
+              f"{r['mb_per_s']:.1f} MB/s | peak {r['peak_kb']:,.0f} KB")
+    return results
+
+def _change(new, old):
+    return (new - old) / old if old else 0.0
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Print each case against the stored baseline and return the names that regressed."""
+    regressions = []
+    print(f"\n📊 Against {BASELINE_FILE}:")
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"   • {name}: no baseline")
+            continue
+        speed = _change(r["items_per_s"], base["items_per_s"])
+        memory = _change(r["peak_kb"], base["peak_kb"])
+        regressed = speed < -threshold or memory > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"   {'⚠️' if regressed else '•'} {name}: throughput {speed:+.1%}, peak memory {memory:+.1%}")
+    return regressions
+
+def load_baseline(path=BASELINE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_baseline(results, path=BASELINE_FILE):
+    baseline = load_baseline(path)
+    baseline.update(results)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"💾 Saved baseline for {len(results)} cases to {path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the playlist pipeline over the committed corpus.")
+    parser.add_argument("cases", nargs="*", help=f"cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--save", action="store_true", help=f"record results as the new {BASELINE_FILE}")
+    args = parser.parse_args(argv)
+    unknown = [c for c in args.cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    corpus = load_corpus()
+    print(f"📚 Corpus: {len(corpus)} files, {corpus_bytes(corpus) / 1024 / 1024:.2f} MB")
+    results = run_cases(args.cases or list(CASES), corpus, args.rounds)
+
+    if args.save:
+        save_baseline(results)
+        return 0
+    return 1 if compare(results, load_baseline()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+
+SERVICE_ENV = "BROWSER_SERVICE_URL"
+DEFAULT_PORT = 9323
+BROWSER_PORT = 9324
+# Restart Firefox after this many pages (once no client holds it) to cap memory growth
+RECYCLE_AFTER_PAGES = 500
+HEALTH_INTERVAL = 15
+STARTUP_TIMEOUT = 60
+# A client that never released its lease is assumed gone after this long
+LEASE_TTL = 3 * 3600
+CLIENT_TIMEOUT = aiohttp.ClientTimeout(total=3)
+# Server-side launch options; connected clients cannot change them
+LAUNCH_OPTIONS = {
+    "headless": True,
+    "firefoxUserPrefs": {
+        "media.autoplay.default": 0,
+        "media.autoplay.blocking_policy": 0,
+    },
+}
+
+class BrowserSupervisor:
+    """
+    Keeps one Firefox running under `playwright launch-server`. Clients
+    lease its websocket endpoint and report the pages they opened on
+    release; a dead or unreachable browser is restarted, and one that
+    has served recycle_after pages is restarted once no lease is held.
+    """
+
+    def __init__(self, port=BROWSER_PORT, recycle_after=RECYCLE_AFTER_PAGES):
+        self.port = port
+        self.recycle_after = recycle_after
+        self.lock = threading.Lock()
+        self.process = None
+        self.ws_endpoint = None
+        self.generation = 0
+        self.pages = 0
+        self.total_pages = 0
+        self.restarts = 0
+        self.leases = {}
+
+    def start(self):
+        options = {**LAUNCH_OPTIONS, "port": self.port, "wsPath": "firefox"}
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(options, f)
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "playwright", "launch-server", "--browser", "firefox", "--config", f.name],
+                stdout=subprocess.PIPE, text=True,
+            )
+            # launch-server prints the endpoint once Firefox is up
+            line = self._read_line(STARTUP_TIMEOUT)
+        finally:
+            os.unlink(f.name)
+        if not line.startswith("ws://"):
+            self.stop()
+            raise RuntimeError(f"launch-server did not start: {line or 'no output'}")
+        self.ws_endpoint = line
+        self.generation += 1
+        self.pages = 0
+        print(f"🦊 Firefox generation {self.generation} at {self.ws_endpoint}")
+
+    def _read_line(self, timeout):
+        result = []
+        reader = threading.Thread(target=lambda: result.append(self.process.stdout.readline()), daemon=True)
+        reader.start()
+        reader.join(timeout)
+        return result[0].strip() if result else ""
+
+    def stop(self):
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+        self.ws_endpoint = None
+
+    def healthy(self):
+        if self.process is None or self.process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection(("127.0.0.1", self.port), timeout=2):
+                return True
+        except OSError:
+            return False
+
+    def _restart(self, reason):
+        print(f"♻️ Restarting Firefox: {reason}")
+        self.stop()
+        self.restarts += 1
+        self.start()
+
+    def _expire_leases(self):
+        cutoff = time.time() - LEASE_TTL
+        for lease_id in [i for i, started in self.leases.items() if started < cutoff]:
+            del self.leases[lease_id]
+
+    def check(self):
+        """Health check: restart a dead browser, recycle a worn one when idle."""
+        with self.lock:
+            self._expire_leases()
+            if not self.healthy():
+                self._restart("health check failed")
+            elif self.pages >= self.recycle_after and not self.leases:
+                self._restart(f"recycling after {self.pages} pages")
+
+    def lease(self):
+        with self.lock:
+            if not self.healthy():
+                self._restart("unhealthy at lease time")
+            lease_id = uuid.uuid4().hex
+            self.leases[lease_id] = time.time()
+            return {"id": lease_id, "ws": self.ws_endpoint, "generation": self.generation}
+
+    def release(self, lease_id, pages):
+        with self.lock:
+            self.leases.pop(lease_id, None)
+            self.pages += pages
+            self.total_pages += pages
+        self.check()
+
+    def status(self):
+        return {
+            "healthy": self.healthy(),
+            "ws": self.ws_endpoint,
+            "generation": self.generation,
+            "pages": self.pages,
+            "total_pages": self.total_pages,
+            "recycle_after": self.recycle_after,
+            "leases": len(self.leases),
+            "restarts": self.restarts,
+        }
+
+class BrowserServiceHandler(BaseHTTPRequestHandler):
+    """GET /health, POST /lease and POST /release {"id", "pages"} against the supervisor."""
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error(404)
+            return
+        status = self.server.supervisor.status()
+        self._reply(200 if status["healthy"] else 503, status)
+
+    def do_POST(self):
+        supervisor = self.server.supervisor
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self.send_error(400, "Bad JSON")
+            return
+        try:
+            if self.path == "/lease":
+                self._reply(200, supervisor.lease())
+            elif self.path == "/release":
+                supervisor.release(payload.get("id"), int(payload.get("pages", 0)))
+                self._reply(200, supervisor.status())
+            else:
+                self.send_error(404)
+        except RuntimeError as e:
+            self._reply(503, {"error": str(e)})
+
+class BrowserService(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, supervisor, verbose=False):
+        super().__init__(address, BrowserServiceHandler)
+        self.supervisor = supervisor
+        self.verbose = verbose
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def _health_loop(supervisor, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            supervisor.check()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+
+async def _call(action, payload=None):
+    base = os.environ.get(SERVICE_ENV, f"http://127.0.0.1:{DEFAULT_PORT}")
+    try:
+        async with aiohttp.ClientSession(timeout=CLIENT_TIMEOUT) as session:
+            async with session.post(f"{base}/{action}", json=payload or {}) as resp:
+                if resp.status != 200:
+                    return None
+                return await resp.json()
+    except (aiohttp.ClientError, OSError, ValueError, asyncio.TimeoutError):
+        return None
+
+async def launch(p, **launch_kwargs):
+    """
+    Drop-in for p.firefox.launch(**launch_kwargs): connects to the browser
+    service when one is running, else launches Firefox locally. A service
+    browser counts the pages opened through it and releases its lease on
+    close(), so the service knows when to recycle.
+    """
+    lease = await _call("lease")
+    if lease is None:
+        return await p.firefox.launch(**launch_kwargs)
+
+    print(f"🔌 Using browser service (Firefox generation {lease['generation']})")
+    browser = await p.firefox.connect(lease["ws"])
+    pages = 0
+    new_context = browser.new_context
+    close = browser.close
+
+    def count_page(page):
+        nonlocal pages
+        pages += 1
+
+    async def counting_new_context(**kwargs):
+        context = await new_context(**kwargs)
+        context.on("page", count_page)
+        return context
+
+    async def close_and_release(**kwargs):
+        try:
+            await close(**kwargs)
+        finally:
+            await _call("release", {"id": lease["id"], "pages": pages})
+
+    browser.new_context = counting_new_context
+    browser.close = close_and_release
+    return browser
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a warm Firefox for the scrapers to connect to.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--browser-port", type=int, default=BROWSER_PORT)
+    parser.add_argument("--recycle-after", type=int, default=RECYCLE_AFTER_PAGES, help="pages before Firefox is restarted")
+    parser.add_argument("--health-interval", type=float, default=HEALTH_INTERVAL, help="seconds between health checks")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    supervisor = BrowserSupervisor(args.browser_port, args.recycle_after)
+    supervisor.start()
+    server = BrowserService((args.host, args.port), supervisor, verbose=args.verbose)
+    threading.Thread(target=_health_loop, args=(supervisor, args.health_interval), daemon=True).start()
+    print(f"🦊 Browser service on {server.base_url}")
+    print(f"   export {SERVICE_ENV}={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        supervisor.stop()
+        print(f"🦊 Served {supervisor.total_pages} pages over {supervisor.generation} generation(s)")
+
+if __name__ == "__main__":
+    main()
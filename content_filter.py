@@ -0,0 +1,51 @@
+import hashlib
+import os
+import re
+from collections import Counter
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nsfw_rules.txt")
+
+def load_rules(path=RULES_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        rules = [line.strip().lower() for line in f]
+    return [r for r in rules if r and not r.startswith("#")]
+
+class ContentFilter:
+    """
+    Keyword filter compiled into one alternation, so an entry's text is
+    scanned once no matter how many rules there are. Rules are stored
+    lowercase and matched against the lowercased entry text.
+    """
+
+    def __init__(self, rules):
+        self.rules = sorted(set(rules), key=lambda r: (-len(r), r))
+        self.version = hashlib.sha1("\n".join(self.rules).encode("utf-8")).hexdigest()[:12]
+        pattern = "|".join(re.escape(r) for r in self.rules) or r"(?!)"
+        self._search = re.compile(pattern).search
+
+    @classmethod
+    def from_file(cls, path=RULES_FILE):
+        return cls(load_rules(path))
+
+    def match_fields(self, extinf, headers, url):
+        """Return the first rule found in the entry's fields, or None."""
+        m = self._search("\n".join((extinf, url, *headers)).lower())
+        return m.group(0) if m else None
+
+    def match(self, entry):
+        return self.match_fields(entry.extinf, entry.headers, entry.url)
+
+    def partition(self, entries):
+        """Split entries into (clean, removed) in one pass; removed holds (entry, rule)."""
+        clean = []
+        removed = []
+        for entry in entries:
+            rule = self.match(entry)
+            if rule is None:
+                clean.append(entry)
+            else:
+                removed.append((entry, rule))
+        return clean, removed
+
+def rule_counts(removed):
+    return Counter(rule for _, rule in removed)
@@ -0,0 +1,110 @@
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# Presentation-only attributes that do not make two copies of a stream different channels
+COSMETIC_ATTRS = ("tvg-logo", "tvg-name", "radio")
+
+def canonical_url(url):
+    """Lowercase scheme/host, drop default ports and fragments, sort pipe params."""
+    base, _, pipe = url.strip().partition("|")
+    parts = urlsplit(base)
+    scheme = parts.scheme.lower()
+    host = parts.netloc.lower()
+    if host.endswith(":" + DEFAULT_PORTS.get(scheme, "")):
+        host = host.rsplit(":", 1)[0]
+    base = urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+    if pipe:
+        base += "|" + "&".join(sorted(p for p in pipe.split("&") if p))
+    return base
+
+def _squash(text):
+    return " ".join(text.split())
+
+def canonical_key(entry, ignore_attrs=COSMETIC_ATTRS):
+    """Identity of a channel regardless of attribute order, case of keys or whitespace."""
+    attrs = tuple(sorted(
+        (k.lower(), _squash(v)) for k, v in entry.attrs.items() if k.lower() not in ignore_attrs
+    ))
+    headers = tuple(sorted(_squash(h) for h in entry.headers))
+    return (canonical_url(entry.url), attrs, _squash(entry.title).casefold(), headers)
+
+def entry_bytes(entry):
+    return sum(len(line.encode("utf-8")) + 1 for line in entry.lines())
+
+class DedupIndex:
+    """
+    Picks one winner per canonical key across all sources. Lower rank wins;
+    on a tie the entry seen first is kept. With orders > 1 every run carries
+    one rank per source order and a winner is kept for each, so several
+    orders cost a single pass.
+    """
+
+    def __init__(self, ignore_attrs=COSMETIC_ATTRS, orders=1):
+        self.ignore_attrs = ignore_attrs
+        self.orders = orders
+        self.best = {}
+        self.seen = 0
+        self.removed = 0
+        self.removed_bytes = 0
+
+    def add_run(self, run, rank):
+        """rank is a number, or a sequence of one rank per order when orders > 1."""
+        ranks = tuple(rank) if self.orders > 1 else (rank,)
+        for entry in run:
+            self.seen += 1
+            key = canonical_key(entry, self.ignore_attrs)
+            current = self.best.get(key)
+            if current is None:
+                self.best[key] = [(r, entry) for r in ranks]
+                continue
+            for i, r in enumerate(ranks):
+                if r < current[i][0]:
+                    current[i] = (r, entry)
+
+    def winners(self, order=0):
+        """Entries kept under one source order, compared by their raw lines."""
+        return {slots[order][1] for slots in self.best.values()}
+
+    def filter_runs(self, runs):
+        """Drop entries that win under no order."""
+        winners = {id(entry) for slots in self.best.values() for _, entry in slots}
+        kept_runs = []
+        for run in runs:
+            kept = []
+            for entry in run:
+                if id(entry) in winners:
+                    kept.append(entry)
+                else:
+                    self.removed += 1
+                    self.removed_bytes += entry_bytes(entry)
+            kept_runs.append(kept)
+        return kept_runs
+
+    def report(self, label=""):
+        print(f"🧹 Dedup{f' ({label})' if label else ''}: removed {self.removed} of {self.seen} entries, "
+              f"{self.removed_bytes / 1024:.1f} KB")
+
+def source_ranker(sources, preferred=()):
+    """
+    Rank sources for dedup: URLs containing one of the preferred substrings
+    come first in that order, the rest follow in their configured order.
+    """
+    order = {url: i for i, url in enumerate(dict.fromkeys(sources))}
+
+    def rank(url):
+        for i, pattern in enumerate(preferred):
+            if pattern in url:
+                return i
+        return len(preferred) + order.get(url, len(order))
+
+    return rank
+
+def dedupe_runs(runs, ranks, label="", orders=1):
+    """Kept runs plus the index, whose winners(order) tells each order's picks apart."""
+    index = DedupIndex(orders=orders)
+    for run, rank in zip(runs, ranks):
+        index.add_run(run, rank)
+    kept = index.filter_runs(runs)
+    index.report(label)
+    return kept, index
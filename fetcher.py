@@ -0,0 +1,55 @@
+import asyncio
+from urllib.parse import urlparse
+
+import aiohttp
+
+from http_client import make_session
+from upstream import upstream_url
+
+# raw.githubusercontent.com serves most sources: one pooled session for every
+# upstream, capped so we never hit a single host too hard.
+TOTAL_CONNECTIONS = 32
+PER_HOST_LIMIT = 8
+FETCH_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+def _decode(content):
+    return content.decode("utf-8", errors="ignore").strip().splitlines()
+
+async def fetch_playlist(session, url, cache=None):
+    """
+    Fetch one playlist and return (lines, not_modified). With a cache, the
+    request carries the stored validators and a 304 is served from disk.
+    """
+    print(f"Fetching: {url}")
+    headers = cache.conditional_headers(url) if cache else {}
+    try:
+        async with session.get(upstream_url(url), headers=headers) as res:
+            if res.status == 304 and cache:
+                print(f"♻️ Not modified: {url}")
+                return _decode(cache.load_body(url)), True
+            res.raise_for_status()
+            content = await res.read()
+            if cache:
+                cache.store_body(url, content, res.headers.get("ETag"), res.headers.get("Last-Modified"))
+            return _decode(content), False
+    except Exception as e:
+        print(f"❌ Error fetching {url}: {e}")
+        return [], False
+
+async def fetch_playlists(urls, cache=None):
+    """
+    Download every URL concurrently over one shared session and yield
+    (url, lines, not_modified) in completion order, so callers can start
+    parsing a source as soon as it lands instead of waiting on the slowest host.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    hosts = {urlparse(u).netloc for u in unique_urls}
+    print(f"🌐 Fetching {len(unique_urls)} playlists from {len(hosts)} hosts")
+
+    async with make_session(TOTAL_CONNECTIONS, PER_HOST_LIMIT, FETCH_TIMEOUT) as session:
+        async def fetch_one(url):
+            lines, not_modified = await fetch_playlist(session, url, cache)
+            return url, lines, not_modified
+
+        for task in asyncio.as_completed([fetch_one(u) for u in unique_urls]):
+            yield await task
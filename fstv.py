@@ -3,6 +3,14 @@ import asyncio
 from playwright.async_api import async_playwright
 import re
 
+import browser_service
+import host_scheduler
+from route_policy import RoutePolicy
+from storage_state import StorageState
+
+ROUTES = RoutePolicy("FSTV")
+STATE = StorageState("FSTV")
+
 CHANNEL_MAPPINGS = {
     "usanetwork": {"name": "USA Network", "tv-id": "USA.Network.-.East.Feed.us"},
     "VE-usa-cbssport (sv3)": {"name": "CBS Sports", "tv-id": "CBS.Sports.Network.USA.us"},
@@ -145,8 +153,8 @@ MIRRORS = [
 
 async def fetch_fstv_html():
     async with async_playwright() as p:
-        browser = await p.firefox.launch(headless=True)
-        context = await browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36")
+        browser = await browser_service.launch(p, headless=True)
+        context = await ROUTES.apply(await browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36", **STATE.context_options()))
         page = await context.new_page()
 
         print("🌐 Visiting FSTV mirrors...")
@@ -154,15 +162,18 @@ async def fetch_fstv_html():
         for url in MIRRORS:
             try:
                 print(f"Trying {url}")
-                await page.goto(url, timeout=90000, wait_until="domcontentloaded")
+                await host_scheduler.get_scheduler().goto(page, url, retries=0, timeout=90000, wait_until="domcontentloaded")
                 await page.wait_for_selector(".item-channel", timeout=15000)
                 print(f"Success with {url}")
                 html = await page.content()
+                await STATE.save(context)
+                await ROUTES.drain()
                 await browser.close()
                 return html
             except Exception as e:
                 print(f"Failed on {url}: {e}")
 
+        await ROUTES.drain()
         await browser.close()
         raise Exception("All mirrors failed to load the channel list")
 
@@ -221,4 +232,7 @@ async def main():
         print(f"❌ Failed to generate playlist: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        ROUTES.report()
@@ -0,0 +1,247 @@
+import asyncio
+import re
+import time
+from urllib.parse import parse_qsl, urljoin, urlsplit
+
+import aiohttp
+
+import http_client
+
+LIVE = "live"
+TOKEN_EXPIRED = "token-expired"
+GEO_BLOCKED = "geo-blocked"
+# Refused for some other reason: missing auth, wrong Referer/Origin
+DENIED = "denied"
+DEAD = "dead"
+
+MAX_MANIFEST_BYTES = 256 * 1024
+SEGMENT_RANGE = "bytes=0-1023"
+BANDWIDTH_RE = re.compile(r"BANDWIDTH=(\d+)")
+EXPIRY_PARAMS = ("expires", "exp", "e")
+# Expiry embedded in the path, e.g. /exp=1759325267/ or /expires/1759325267/
+PATH_EXPIRY_RE = re.compile(r"/(?:expires?|exp)[=/_-]?(\d{10,13})(?:/|$)", re.IGNORECASE)
+# Whole words only, so "georgia" or "regional" in a block page is not a geo hint
+GEO_HINTS_RE = re.compile(
+    r"\b(?:geo(?:[-_ ]?(?:block|restrict|fenc|locat|ip)\w*|graphic\w*)?|country|region)\b|not available in your",
+    re.IGNORECASE,
+)
+
+class HlsResult:
+    """Outcome of one validation: status is LIVE, TOKEN_EXPIRED, GEO_BLOCKED, DENIED or DEAD."""
+
+    __slots__ = ("url", "status", "http_status", "detail", "variant_url", "segment_url",
+                 "manifest_ms", "segment_ms", "bytes_read", "network_error")
+
+    def __init__(self, url):
+        self.url = url
+        self.status = DEAD
+        self.http_status = None
+        self.detail = ""
+        self.variant_url = None
+        self.segment_url = None
+        self.manifest_ms = 0
+        self.segment_ms = 0
+        self.bytes_read = 0
+        self.network_error = False
+
+    @property
+    def ok(self):
+        return self.status == LIVE
+
+    @property
+    def host_failed(self):
+        """
+        True when the host itself failed to serve (connection error, timeout,
+        429 or 5xx), as opposed to refusing this URL or serving bad content.
+        """
+        if self.status != DEAD:
+            return False
+        return self.network_error or self.http_status == 429 or (self.http_status or 0) >= 500
+
+    @property
+    def timed(self):
+        """False when no request was made (cached or trusted outcome), so there are no timings."""
+        return self.detail not in ("cached", "trusted")
+
+    @property
+    def total_ms(self):
+        return self.manifest_ms + self.segment_ms
+
+    def __str__(self):
+        detail = f", {self.detail}" if self.detail else ""
+        return (f"{self.status} (HTTP {self.http_status}{detail}) manifest {self.manifest_ms}ms, "
+                f"segment {self.segment_ms}ms, {self.bytes_read} B")
+
+def token_expiry(url):
+    """Unix time a signed URL stops working, from its query or path; None if unsigned."""
+    parts = urlsplit(url)
+    params = {k.lower(): v for k, v in parse_qsl(parts.query)}
+    value = next((params[key] for key in EXPIRY_PARAMS if params.get(key, "").isdigit()), None)
+    if value is None:
+        m = PATH_EXPIRY_RE.search(parts.path)
+        value = m.group(1) if m else None
+    if value is None:
+        return None
+    expiry = int(value)
+    # Millisecond timestamps
+    return expiry // 1000 if expiry > 10 ** 12 else expiry
+
+def classify_denied(url, status, body=""):
+    """
+    Tell an expired signed URL from a geo block for a 401/403/410/451.
+    Only a past expiry, a 410 or an "expired" body count as expiry; any
+    other 401/403 without a geo hint is DENIED, signed URL or not.
+    """
+    if status == 451:
+        return GEO_BLOCKED
+    text = body.lower()
+    if GEO_HINTS_RE.search(text):
+        return GEO_BLOCKED
+    expiry = token_expiry(url)
+    if expiry is not None and expiry < time.time():
+        return TOKEN_EXPIRED
+    if status == 410 or "expired" in text:
+        return TOKEN_EXPIRED
+    return DENIED
+
+def parse_playlist_text(text, base_url):
+    """Return ("master", [(bandwidth, url), ...]) or ("media", [segment_url, ...])."""
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    variants = []
+    segments = []
+    pending_bandwidth = None
+    for line in lines:
+        if line.startswith("#EXT-X-STREAM-INF"):
+            m = BANDWIDTH_RE.search(line)
+            pending_bandwidth = int(m.group(1)) if m else 0
+        elif line.startswith("#"):
+            continue
+        elif pending_bandwidth is not None:
+            variants.append((pending_bandwidth, urljoin(base_url, line)))
+            pending_bandwidth = None
+        else:
+            segments.append(urljoin(base_url, line))
+    if variants:
+        return "master", variants
+    return "media", segments
+
+async def _read_capped(resp, limit):
+    chunks = []
+    size = 0
+    while size < limit:
+        chunk = await resp.content.read(limit - size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    return b"".join(chunks)
+
+async def _read_manifest(session, url, headers, result):
+    """GET a playlist's text (capped); returns it, or None after recording why it failed."""
+    start = time.perf_counter()
+    try:
+        async with session.get(url, headers=headers, allow_redirects=True) as resp:
+            body = await _read_capped(resp, MAX_MANIFEST_BYTES)
+            result.http_status = resp.status
+            final_url = str(resp.url)
+    finally:
+        result.manifest_ms += round((time.perf_counter() - start) * 1000)
+    result.bytes_read += len(body)
+    text = body.decode("utf-8", errors="ignore")
+    if result.http_status in (401, 403, 410, 451):
+        result.status = classify_denied(url, result.http_status, text)
+        return None, final_url
+    if result.http_status >= 400:
+        result.detail = "manifest error"
+        return None, final_url
+    if not text.lstrip().startswith("#EXTM3U"):
+        result.detail = "not an HLS playlist"
+        return None, final_url
+    return text, final_url
+
+async def validate(url, headers=None, session=None, cache=None):
+    """
+    Cheap playability check for an HLS URL: read the manifest text, follow
+    the lowest-bandwidth variant of a master playlist, then fetch the first
+    KB of the newest segment with a ranged GET. With a ValidationCache, a
+    fresh cached outcome is returned without touching the network.
+    """
+    result = HlsResult(url)
+    if cache is not None:
+        cached = cache.get(url)
+        if cached is not None:
+            result.status = cached
+            result.detail = "cached"
+            return result
+        result = await validate(url, headers, session)
+        cache.put(url, result.status, result.http_status, transient=result.host_failed)
+        return result
+
+    session = session or http_client.get_session()
+    headers = dict(headers or {})
+    try:
+        text, base = await _read_manifest(session, url, headers, result)
+        if text is None:
+            return result
+        kind, items = parse_playlist_text(text, base)
+        if kind == "master":
+            result.variant_url = min(items)[1]
+            text, base = await _read_manifest(session, result.variant_url, headers, result)
+            if text is None:
+                return result
+            kind, items = parse_playlist_text(text, base)
+            if kind == "master":
+                result.detail = "nested master playlist"
+                return result
+        if not items:
+            result.detail = "no segments"
+            return result
+
+        # Live windows drop old segments first; the newest is the one most likely served
+        result.segment_url = items[-1]
+        start = time.perf_counter()
+        try:
+            async with session.get(result.segment_url, headers={**headers, "Range": SEGMENT_RANGE}) as resp:
+                chunk = await _read_capped(resp, 1024)
+                seg_status = resp.status
+        finally:
+            result.segment_ms = round((time.perf_counter() - start) * 1000)
+        result.bytes_read += len(chunk)
+        result.http_status = seg_status
+        if seg_status in (200, 206) and chunk:
+            result.status = LIVE
+        elif seg_status in (401, 403, 410, 451):
+            result.status = classify_denied(result.segment_url, seg_status)
+            result.detail = "segment denied"
+        else:
+            result.detail = "segment error"
+    except asyncio.TimeoutError:
+        result.detail = "timeout"
+        result.network_error = True
+    except aiohttp.ClientError as e:
+        result.detail = type(e).__name__
+        result.network_error = True
+    except ValueError as e:
+        result.detail = type(e).__name__
+    return result
+
+async def rank(urls, headers=None, session=None):
+    """
+    Measure every candidate afresh (cached outcomes carry no timings) and
+    return their HlsResults fastest first by manifest + segment time.
+    Candidates that fail the re-check sort last rather than being dropped.
+    """
+    results = await asyncio.gather(*(validate(url, headers, session) for url in urls))
+    return sorted(results, key=lambda r: (not r.ok, r.total_ms))
+
+async def rank_results(results, headers=None, session=None):
+    """
+    Like rank(), for candidates that were already validated: only results
+    without timings are measured again, the rest are ranked as they are.
+    """
+    results = list(results)
+    untimed = [i for i, r in enumerate(results) if not r.timed]
+    remeasured = await asyncio.gather(*(validate(results[i].url, headers, session) for i in untimed))
+    for i, result in zip(untimed, remeasured):
+        results[i] = result
+    return sorted(results, key=lambda r: (not r.ok, r.total_ms))
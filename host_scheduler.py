@@ -0,0 +1,174 @@
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+# Per-host pacing: start at DEFAULT_RATE requests/s, creep up towards
+# MAX_RATE while the host answers, halve on every failure.
+DEFAULT_RATE = 1.0
+MIN_RATE = 0.2
+MAX_RATE = 4.0
+BURST = 3
+RATE_STEP = 0.25
+# Retries back off exponentially with full jitter
+MAX_RETRIES = 2
+BASE_DELAY = 0.5
+MAX_DELAY = 20.0
+# Consecutive failures that open a host's circuit, and how long it stays open
+FAILURE_THRESHOLD = 5
+RESET_AFTER = 60.0
+
+_scheduler = None
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit is open."""
+
+class TokenBucket:
+    """Token bucket whose refill rate adapts: additive increase, multiplicative decrease."""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Take one token, sleeping until it is available; returns seconds waited."""
+        waited = 0.0
+        async with self.lock:
+            self._refill()
+            if self.tokens < 1:
+                waited = (1 - self.tokens) / self.rate
+                await asyncio.sleep(waited)
+                self._refill()
+            self.tokens -= 1
+        return waited
+
+    def adapt(self, ok):
+        if ok:
+            self.rate = min(MAX_RATE, self.rate + RATE_STEP)
+        else:
+            self.rate = max(MIN_RATE, self.rate / 2)
+
+class CircuitBreaker:
+    """
+    Closed until threshold consecutive failures, then open for reset_after
+    seconds, then half-open: a single probe call goes through and every
+    other caller is rejected until the probe's outcome is recorded.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, reset_after=RESET_AFTER):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        # When the half-open probe was let through; None when no probe is out
+        self._probe_in_flight = None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_after:
+            return False
+        # A probe that never reported back (e.g. cancelled) stops blocking after another cool-down
+        if self._probe_in_flight is not None and now - self._probe_in_flight < self.reset_after:
+            return False
+        self._probe_in_flight = now
+        return True
+
+    def record(self, ok):
+        self._probe_in_flight = None
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+class HostScheduler:
+    """
+    Single gate for outbound requests and page navigations. Each host gets
+    an adaptive token bucket and a circuit breaker; failed calls are retried
+    with jittered exponential backoff.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=BURST, max_retries=MAX_RETRIES,
+                 failure_threshold=FAILURE_THRESHOLD, reset_after=RESET_AFTER, host_rates=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.host_rates = host_rates or {}
+        self.buckets = {}
+        self.breakers = defaultdict(lambda: CircuitBreaker(failure_threshold, reset_after))
+        self.stats = defaultdict(Counter)
+        self.waited = defaultdict(float)
+
+    def _bucket(self, host):
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.host_rates.get(host, self.rate), self.burst)
+        return self.buckets[host]
+
+    @staticmethod
+    def backoff(attempt):
+        return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+
+    def _record(self, host, ok):
+        self.breakers[host].record(ok)
+        self._bucket(host).adapt(ok)
+        self.stats[host]["ok" if ok else "failed"] += 1
+
+    async def run(self, url, op, retries=None, failed=None):
+        """
+        Await op() under url's host limits. Exceptions (and results for which
+        failed(result) is true) count against the host; exceptions are retried
+        up to retries times before being re-raised.
+        """
+        host = urlsplit(url).netloc or url
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            if not self.breakers[host].allow():
+                self.stats[host]["short-circuited"] += 1
+                raise CircuitOpenError(f"circuit open for {host}")
+            self.waited[host] += await self._bucket(host).acquire()
+            try:
+                result = await op()
+            except Exception:
+                self._record(host, False)
+                if attempt == retries:
+                    raise
+                self.stats[host]["retried"] += 1
+                delay = self.backoff(attempt)
+                self.waited[host] += delay
+                await asyncio.sleep(delay)
+                continue
+            self._record(host, not (failed and failed(result)))
+            return result
+
+    async def goto(self, page, url, retries=None, **kwargs):
+        """page.goto through the scheduler; kwargs go to Playwright unchanged."""
+        return await self.run(url, lambda: page.goto(url, **kwargs), retries=retries)
+
+    def report(self):
+        if not self.stats:
+            return
+        print("🚦 Host scheduler:")
+        for host, c in sorted(self.stats.items(), key=lambda kv: -sum(kv[1].values())):
+            extra = "".join(f", {c[k]} {k}" for k in ("retried", "short-circuited") if c[k])
+            print(f"   • {host}: {c['ok']} ok, {c['failed']} failed{extra}, "
+                  f"{self.waited[host]:.1f}s waiting, {self._bucket(host).rate:.2f} req/s")
+
+def get_scheduler():
+    """Process-wide scheduler, so every script and helper shares host state."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = HostScheduler()
+    return _scheduler
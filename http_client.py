@@ -0,0 +1,48 @@
+import asyncio
+
+import aiohttp
+
+# Connection policy shared by every script: keep sockets to the handful of
+# stream/CDN hosts alive between checks, cache DNS, and cap per-host load.
+TOTAL_CONNECTIONS = 64
+PER_HOST_LIMIT = 8
+KEEPALIVE_SECONDS = 60
+DNS_CACHE_SECONDS = 300
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=15, sock_connect=5, sock_read=7)
+
+_session = None
+
+def make_session(limit=TOTAL_CONNECTIONS, per_host=PER_HOST_LIMIT, timeout=DEFAULT_TIMEOUT):
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=per_host,
+        keepalive_timeout=KEEPALIVE_SECONDS,
+        ttl_dns_cache=DNS_CACHE_SECONDS,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+def get_session():
+    """
+    The process-wide pooled session, created on first use inside the
+    running event loop. Callers must not close it; use close_session().
+    """
+    global _session
+    if _session is None or _session.closed:
+        _session = make_session()
+    return _session
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+def run(coro):
+    """asyncio.run(coro), closing the shared session before the loop shuts down."""
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await close_session()
+
+    return asyncio.run(runner())
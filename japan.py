@@ -1,42 +1,37 @@
 import requests
 import re
 
+from m3u_parser import iter_entries
+from upstream import upstream_url
+
 UPSTREAM_URL = "https://raw.githubusercontent.com/luongz/iptv-jp/refs/heads/main/jp.m3u"
 OUTPUT_FILE = "JapanTV.m3u8"
 FORCED_GROUP_NAME = "JapanTV"
 TVG_HEADER = '#EXTM3U url-tvg="https://epg.freejptv.com/jp.xml,https://animenosekai.github.io/japanterebi-xmltv/guide.xml" tvg-shift=0'
 
 def clean_and_force_group(m3u_content):
-    lines = m3u_content.strip().splitlines()
     output_lines = [TVG_HEADER]
-    skip_next = False
 
-    for i, line in enumerate(lines):
-        if skip_next:
-            skip_next = False
+    for entry in iter_entries(m3u_content):
+        # Skip if it's an Information group
+        if entry.group_title == "Information":
             continue
 
-        if line.startswith("#EXTINF"):
-            # Skip if it's an Information group
-            if 'group-title="Information"' in line:
-                skip_next = True
-                continue
-
-            # Force group-title to JapanTV
-            if 'group-title="' in line:
-                line = re.sub(r'group-title=".*?"', f'group-title="{FORCED_GROUP_NAME}"', line)
-            else:
-                line = line.replace('#EXTINF:', f'#EXTINF group-title="{FORCED_GROUP_NAME}":')
-            output_lines.append(line)
-            if i + 1 < len(lines):
-                output_lines.append(lines[i + 1])
-                skip_next = True
+        # Force group-title to JapanTV
+        line = entry.extinf
+        if "group-title" in entry.attrs:
+            line = re.sub(r'group-title=".*?"', f'group-title="{FORCED_GROUP_NAME}"', line)
+        else:
+            line = line.replace('#EXTINF:', f'#EXTINF group-title="{FORCED_GROUP_NAME}":')
+        output_lines.append(line)
+        output_lines.extend(entry.headers)
+        output_lines.append(entry.url)
 
     return "\n".join(output_lines)
 
 def main():
     print("📥 Downloading upstream playlist...")
-    response = requests.get(UPSTREAM_URL)
+    response = requests.get(upstream_url(UPSTREAM_URL))
     if response.status_code != 200:
         print(f"❌ Failed to download: HTTP {response.status_code}")
         return
@@ -0,0 +1,136 @@
+import asyncio
+import time
+
+import host_scheduler
+
+# Seconds allowed per stream once the page has loaded
+DEADLINE = 20.0
+# How long to watch quietly before, and after, each escalation step
+STEP_WAIT = 3.0
+
+def manifest_url(url):
+    """Default extractor: the URL itself when it points at an HLS manifest."""
+    return url if ".m3u8" in url.lower() else None
+
+async def click_center(page):
+    size = page.viewport_size or {"width": 800, "height": 600}
+    await page.mouse.click(size["width"] // 2, size["height"] // 2)
+
+async def play_media(page):
+    for frame in page.frames:
+        try:
+            await frame.evaluate(
+                "() => document.querySelectorAll('video').forEach(v => { v.muted = true; v.play().catch(() => {}); })"
+            )
+        except Exception:
+            pass
+
+async def click_frames(page):
+    for frame in page.frames[1:]:
+        try:
+            await frame.locator("body").click(timeout=2000)
+        except Exception:
+            pass
+
+async def open_first_iframe(page):
+    """Navigate straight to the first iframe's src, for players that only start top-level."""
+    src = await page.evaluate("() => document.querySelector('iframe[src]')?.src")
+    if src:
+        print(f"🔍 Entering iframe: {src}")
+        await host_scheduler.get_scheduler().goto(page, src, timeout=15000, wait_until="domcontentloaded")
+
+ESCALATION = (click_center, play_media, click_frames)
+
+class ManifestCapture:
+    """
+    Records manifest URLs requested by a page (any frame) while attached,
+    and lets callers await the first `want` of them instead of sleeping.
+    `extract` maps a request URL to the manifest URL to keep, or None.
+    """
+
+    def __init__(self, page, want=1, extract=manifest_url):
+        self.page = page
+        self.want = want
+        self.extract = extract
+        self.urls = []
+        self._enough = asyncio.Event()
+
+    def _on_request(self, request):
+        url = self.extract(request.url)
+        if url and url not in self.urls:
+            print(f"🎯 Found manifest: {url}")
+            self.urls.append(url)
+            if len(self.urls) >= self.want:
+                self._enough.set()
+
+    async def __aenter__(self):
+        self.started = time.perf_counter()
+        self.page.on("request", self._on_request)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.page.remove_listener("request", self._on_request)
+
+    @property
+    def done(self):
+        return self._enough.is_set()
+
+    def expect(self, more=1):
+        """Wait for `more` manifests beyond those already seen, e.g. after switching quality."""
+        self.want = len(self.urls) + more
+        self._enough.clear()
+
+    async def wait(self, timeout):
+        """True once enough manifests were seen, False if timeout ran out first."""
+        if timeout > 0 and not self.done:
+            try:
+                await asyncio.wait_for(self._enough.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.done
+
+    async def escalate(self, steps=ESCALATION, deadline=DEADLINE, patience=STEP_WAIT, step_wait=STEP_WAIT):
+        """
+        Wait `patience` seconds, then run each step in turn, watching
+        step_wait seconds after each, until enough manifests arrived or the
+        deadline passed. Returns the manifest URLs seen so far.
+        """
+        end = time.perf_counter() + deadline
+        if not await self.wait(min(patience, deadline)):
+            for step in steps:
+                remaining = end - time.perf_counter()
+                if remaining <= 0:
+                    break
+                print(f"🖱️ No manifest yet, trying {step.__name__}")
+                try:
+                    await step(self.page)
+                except Exception as e:
+                    print(f"⚠️ {step.__name__} failed: {e}")
+                if await self.wait(min(step_wait, end - time.perf_counter())):
+                    break
+            else:
+                await self.wait(end - time.perf_counter())
+        elapsed = time.perf_counter() - self.started
+        if self.urls:
+            print(f"⏱️ {len(self.urls)} manifest(s) in {elapsed:.1f}s")
+        else:
+            print(f"⏱️ No manifest after {elapsed:.1f}s")
+        return list(self.urls)
+
+async def capture(page, url=None, steps=ESCALATION, deadline=DEADLINE, patience=STEP_WAIT,
+                  want=1, extract=manifest_url, goto_timeout=30000, settle=0):
+    """
+    Load url (when given) through the host scheduler and return the manifest
+    URLs the page requests, as soon as `want` of them are seen. With settle,
+    keep listening that many seconds after the first hit for alternates
+    (backup CDNs, other qualities). Navigation errors propagate to the caller.
+    """
+    async with ManifestCapture(page, want, extract) as cap:
+        if url:
+            await host_scheduler.get_scheduler().goto(page, url, timeout=goto_timeout, wait_until="domcontentloaded")
+        urls = await cap.escalate(steps, deadline, patience)
+        if urls and settle > 0:
+            await asyncio.sleep(settle)
+            if len(cap.urls) > len(urls):
+                print(f"⏱️ {len(cap.urls) - len(urls)} more manifest(s) while settling")
+        return list(cap.urls)
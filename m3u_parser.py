@@ -0,0 +1,150 @@
+import re
+
+# Attribute section is everything up to the first comma that is not inside
+# quotes, so titles and tvg-ids containing commas survive intact.
+EXTINF_RE = re.compile(r'^#EXTINF:?([^,"]*(?:"[^"]*"[^,"]*)*),(.*)$')
+ATTR_RE = re.compile(r'([\w-]+)="([^"]*)"')
+GROUP_TITLE_RE = re.compile(r'group-title="([^"]*)"')
+DURATION_RE = re.compile(r'\s*(-?\d+(?:\.\d+)?)')
+VLCOPT_PREFIX = "#EXTVLCOPT:"
+
+def parse_extinf(line):
+    """Split an #EXTINF line into (duration, attrs, title)."""
+    m = EXTINF_RE.match(line)
+    if m:
+        head, title = m.group(1), m.group(2).strip()
+    else:
+        head, title = line[7:].lstrip(":"), ""
+    d = DURATION_RE.match(head)
+    duration = d.group(1) if d else ""
+    attrs = dict(ATTR_RE.findall(head))
+    if "group-title" not in attrs:
+        # An unclosed quote (tvg-id="CTV.(CKY).Winnipeg group-title="...) swallows
+        # group-title into the value before it; searching the whole line still finds it
+        g = GROUP_TITLE_RE.search(line)
+        if g:
+            attrs["group-title"] = g.group(1)
+    return duration, attrs, title
+
+def parse_vlcopts(headers):
+    """Map '#EXTVLCOPT:key=value' header lines to {key: value}."""
+    opts = {}
+    for h in headers:
+        if h.startswith(VLCOPT_PREFIX):
+            key, sep, value = h[len(VLCOPT_PREFIX):].partition("=")
+            if sep:
+                opts[key.strip()] = value.strip()
+    return opts
+
+class Entry:
+    """
+    One playlist channel. Equality and hashing use the raw
+    (extinf, headers, url) triple, and iterating an Entry yields that
+    triple, so entries drop into code written for plain tuples. rule is
+    set by the content filter stage on entries it removed.
+    """
+
+    __slots__ = ("extinf", "headers", "url", "duration", "attrs", "title", "vlcopts", "rule")
+
+    def __init__(self, extinf, headers=(), url="", parsed=None):
+        self.extinf = extinf
+        self.headers = tuple(headers)
+        self.url = url
+        self.duration, self.attrs, self.title = parsed or parse_extinf(extinf)
+        self.vlcopts = parse_vlcopts(self.headers) if self.headers else {}
+        self.rule = None
+
+    @property
+    def tvg_id(self):
+        return self.attrs.get("tvg-id", "")
+
+    @property
+    def tvg_logo(self):
+        return self.attrs.get("tvg-logo", "")
+
+    @property
+    def group_title(self):
+        return self.attrs.get("group-title", "")
+
+    def key(self):
+        return (self.extinf, self.headers, self.url)
+
+    def sort_key(self):
+        """Merged-playlist order: group, then title, case-insensitive."""
+        group = self.group_title or "Other"
+        return (group.lower(), self.title.lower(), group, self.extinf, self.headers, self.url)
+
+    def lines(self):
+        return [self.extinf, *self.headers, self.url]
+
+    def to_record(self):
+        """JSON-friendly form that restores without re-parsing the EXTINF."""
+        record = [self.extinf, list(self.headers), self.url, self.duration, self.attrs, self.title]
+        if self.rule is not None:
+            record.append(self.rule)
+        return record
+
+    @classmethod
+    def from_record(cls, record):
+        extinf, headers, url, duration, attrs, title, *rule = record
+        entry = cls(extinf, headers, url, parsed=(duration, attrs, title))
+        entry.rule = rule[0] if rule else None
+        return entry
+
+    def __iter__(self):
+        return iter((self.extinf, self.headers, self.url))
+
+    def __eq__(self, other):
+        if isinstance(other, Entry):
+            return self.key() == other.key()
+        if isinstance(other, tuple):
+            return self.key() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return f"Entry({self.title!r}, group={self.group_title!r}, url={self.url!r})"
+
+def iter_lines(source):
+    """Yield stripped text lines from a str, bytes, or any iterable of lines."""
+    if isinstance(source, bytes):
+        source = source.decode("utf-8", errors="ignore")
+    if isinstance(source, str):
+        source = source.splitlines()
+    for line in source:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="ignore")
+        yield line.strip()
+
+def iter_entries(source, on_skip=None):
+    """
+    Stream Entry records out of an M3U source. Comment lines between an
+    #EXTINF and its URL become the entry's headers; blank lines are
+    ignored. An #EXTINF that is never followed by a URL is dropped and
+    reported through on_skip(extinf) when given.
+    """
+    extinf = None
+    headers = []
+    for line in iter_lines(source):
+        if not line:
+            continue
+        if line.startswith("#EXTINF"):
+            if extinf is not None and on_skip:
+                on_skip(extinf)
+            extinf = line
+            headers = []
+        elif extinf is None:
+            continue
+        elif line.startswith("#"):
+            headers.append(line)
+        else:
+            yield Entry(extinf, headers, line)
+            extinf = None
+    if extinf is not None and on_skip:
+        on_skip(extinf)
+
+def parse_file(path):
+    with open(path, "rb") as f:
+        return list(iter_entries(f))
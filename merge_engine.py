@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+from collections import Counter
+from datetime import datetime
+
+from content_filter import ContentFilter
+from dedup import dedupe_runs, source_ranker
+from fetcher import fetch_playlists
+from m3u_parser import iter_entries
+from playlist_writer import PlaylistWriter, merge_sorted_runs, sort_run
+from prober import Prober, drop_dead_entries
+from snapshots import SnapshotStore
+from source_cache import SourceCache
+import validation_cache
+
+playlist_urls = [
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/DaddyLive.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/DrewAll.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/JapanTV.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/PlexTV.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/PlutoTV.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/SamsungTVPlus.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/TubiTV.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/DrewLiveVOD.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/UDPTV.m3u",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/TVPass.m3u",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/Radio.m3u8",
+    "http://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/DaddyLiveEvents.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/PPVLand.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/StreamEast.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/FSTV24.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/PBSKids.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/TheTVApp.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/Roku.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/StreamedSU.m3u8",
+    "http://drewlive24.duckdns.org:8081/Tims247.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/LGTV.m3u8",
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/AriaPlus.m3u8"
+]
+
+
+UDPTV_URL = "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/UDPTV.m3u"
+EPG_URL = "http://drewlive24.duckdns.org:8081/merged2_epg.xml.gz"
+NSFW_FILTER = ContentFilter.from_file()
+
+# iptv.py ranked Roku ahead of TheTVApp; MergedPlaylist.m3u8 keeps that
+# dedup order so its winners for channels both carry do not change
+ROKU_URL = "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/Roku.m3u8"
+RAW_SOURCE_ORDER = [url for url in playlist_urls if url != ROKU_URL]
+RAW_SOURCE_ORDER.insert(RAW_SOURCE_ORDER.index(
+    "https://raw.githubusercontent.com/Drewski2423/DrewLive/refs/heads/main/TheTVApp.m3u8"), ROKU_URL)
+
+# Substrings of source URLs whose copy wins when the same channel appears in
+# several upstreams, highest priority first. Unlisted sources rank by their
+# position in their sink's source order (playlist_urls unless it sets one).
+SOURCE_PRIORITY = []
+
+# Bump when what build_runs stores (or how entries parse) changes, so
+# snapshots from older runs get rebuilt
+SNAPSHOT_FORMAT = 3
+
+def extract_udptv_timestamp(lines):
+    for line in lines:
+        if line.strip().startswith("# Last forced update:"):
+            print(f"✅ UDPTV timestamp found: {line.strip()}")
+            return line.strip()
+    print("⚠️ UDPTV timestamp not found.")
+    return None
+
+def parse_playlist(lines, source="Unknown"):
+    def warn(extinf):
+        print(f"⚠️ Warning ({source}): EXTINF without URL: {extinf}")
+
+    parsed = list(iter_entries(lines, on_skip=warn))
+    print(f"✅ Parsed {len(parsed)} entries from {source}")
+    return parsed
+
+def is_nsfw(extinf, headers, url):
+    return NSFW_FILTER.match_fields(extinf, headers, url) is not None
+
+def build_runs(lines, url):
+    clean, removed = NSFW_FILTER.partition(parse_playlist(lines, url))
+    # The sinks read the matched rule off the entry instead of matching again
+    for entry, rule in removed:
+        entry.rule = rule
+    return {
+        "clean": sort_run(clean),
+        "removed": sort_run(entry for entry, _ in removed),
+    }
+
+class PlaylistSink:
+    """
+    Grouped merged playlist of the entries accept(rule) lets through; rule
+    is None for clean entries. source_order, if given, replaces
+    playlist_urls as the dedup rank for this sink.
+    """
+
+    def __init__(self, path, label, accept, source_order=None):
+        self.path = path
+        self.label = label
+        self.accept = accept
+        self.source_order = source_order
+        self.writer = None
+
+    def open(self, timestamp_line):
+        header = [f'#EXTM3U url-tvg="{EPG_URL}"']
+        if timestamp_line:
+            header.append(timestamp_line)
+        self.writer = PlaylistWriter(self.path, header)
+
+    def write(self, entry, rule):
+        if self.accept(rule):
+            self.writer.write(entry)
+
+    def close(self):
+        self.writer.close()
+        print(f"✅ Wrote {self.writer.count} {self.label} channels to {self.path} ({self.writer.lines} lines)")
+
+    def abort(self):
+        if self.writer:
+            self.writer.abort()
+
+class RemovedSink:
+    """Flat log of filtered entries, each preceded by the rule that removed it."""
+
+    source_order = None
+
+    def __init__(self, path):
+        self.path = path
+        self.rules = Counter()
+        self.writer = None
+
+    def open(self, timestamp_line):
+        self.writer = PlaylistWriter(self.path, ["#EXTM3U"], grouped=False)
+
+    def write(self, entry, rule):
+        if rule is not None:
+            self.writer.write(entry, comment=f"Removed by rule: {rule}")
+            self.rules[rule] += 1
+
+    def close(self):
+        # Nothing filtered: leave any previous log alone rather than writing an empty one
+        if not self.writer.count:
+            self.writer.abort()
+            return
+        self.writer.close()
+        print(f"🗑️ Logged {self.writer.count} removed NSFW/XXX/Porn entries to {self.path}")
+        for rule, count in self.rules.most_common():
+            print(f"   • {rule}: {count}")
+
+    def abort(self):
+        if self.writer:
+            self.writer.abort()
+
+SINKS = {
+    "raw": lambda: PlaylistSink("MergedPlaylist.m3u8", "merged", lambda rule: True, RAW_SOURCE_ORDER),
+    "clean": lambda: PlaylistSink("MergedCleanPlaylist.m3u8", "clean", lambda rule: rule is None),
+    "removed": lambda: RemovedSink("Removed_NSFW.m3u8"),
+}
+
+async def merge(sink_names=None, probe=False, drop_dead=False):
+    """
+    Fetch and parse every source once, then stream the merged entries into
+    each named sink. probe runs the liveness prober over the merged entries;
+    drop_dead (implies probe) also leaves out entries it has marked dead.
+    """
+    print(f"🚀 Starting merge: {datetime.now()}\n")
+
+    sinks = [SINKS[name]() for name in (sink_names or SINKS)]
+    sources = [UDPTV_URL] + playlist_urls
+    run_urls = []
+    clean_runs = []
+    removed_runs = []
+    timestamp_line = None
+    cache = SourceCache()
+    snapshots = SnapshotStore("merge", salt=f"{NSFW_FILTER.version}:{SNAPSHOT_FORMAT}")
+
+    # Fetch every source at once; only sources whose content changed get re-parsed
+    async for url, lines, _ in fetch_playlists(sources, cache):
+        if url == UDPTV_URL:
+            timestamp_line = extract_udptv_timestamp(lines)
+        content_hash = snapshots.content_hash(lines)
+        runs = snapshots.load(url, content_hash)
+        if runs is None:
+            runs = build_runs(lines, url)
+            snapshots.save(url, content_hash, runs)
+        else:
+            print(f"♻️ Unchanged, reused snapshot for {url}")
+        run_urls.append(url)
+        clean_runs.append(runs["clean"])
+        removed_runs.append(runs["removed"])
+
+    cache.save()
+    cache.report()
+    snapshots.prune(sources)
+    snapshots.report()
+
+    # Collapse channels that differ only in whitespace, attribute order or
+    # upstream; one index pass ranks by every source order the sinks use
+    orders = list(dict.fromkeys(tuple(sink.source_order or playlist_urls) for sink in sinks))
+    rankers = [source_ranker([UDPTV_URL, *order], SOURCE_PRIORITY) for order in orders]
+    ranks = [tuple(rank(u) for rank in rankers) for u in run_urls]
+    clean_runs, clean_index = dedupe_runs(clean_runs, ranks, "clean", len(orders))
+    removed_runs, removed_index = dedupe_runs(removed_runs, ranks, "removed", len(orders))
+
+    if probe or drop_dead:
+        prober = Prober(cache=validation_cache.get_cache())
+        results = await prober.probe(e for run in clean_runs + removed_runs for e in run)
+        prober.save(results)
+        prober.report(results)
+        validation_cache.close_cache()
+        if drop_dead:
+            clean_runs = drop_dead_entries(clean_runs, prober)
+            removed_runs = drop_dead_entries(removed_runs, prober)
+
+    # One k-way merge over every run; with several orders each sink only
+    # takes the entries that won under its own
+    winners = [None] if len(orders) == 1 else [
+        clean_index.winners(i) | removed_index.winners(i) for i in range(len(orders))
+    ]
+    sink_winners = [winners[orders.index(tuple(sink.source_order or playlist_urls))] for sink in sinks]
+    print()
+    try:
+        for sink in sinks:
+            sink.open(timestamp_line)
+        for entry in merge_sorted_runs(clean_runs + removed_runs):
+            for sink, kept in zip(sinks, sink_winners):
+                if kept is None or entry in kept:
+                    sink.write(entry, entry.rule)
+    except BaseException:
+        for sink in sinks:
+            sink.abort()
+        raise
+    for sink in sinks:
+        sink.close()
+
+    print(f"\n✅ Merge complete: {datetime.now()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge every upstream playlist into the configured outputs.")
+    parser.add_argument("sinks", nargs="*", help=f"outputs to write (default: all of {', '.join(SINKS)})")
+    parser.add_argument("--probe", action="store_true", help="check stream liveness and update the health report")
+    parser.add_argument("--drop-dead", action="store_true", help="probe, then leave out entries marked dead")
+    args = parser.parse_args()
+    unknown = [s for s in args.sinks if s not in SINKS]
+    if unknown:
+        parser.error(f"unknown sink(s): {', '.join(unknown)}")
+    asyncio.run(merge(args.sinks, probe=args.probe, drop_dead=args.drop_dead))
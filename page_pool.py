@@ -0,0 +1,63 @@
+import asyncio
+import os
+
+DEFAULT_CONCURRENCY = 4
+
+def concurrency_from_env(name, default=DEFAULT_CONCURRENCY):
+    """Worker count from an environment variable, at least 1."""
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+class PagePool:
+    """
+    A fixed number of workers, each with its own browser context and page,
+    draining one shared work queue. Separate contexts keep cookies, storage
+    and response listeners from leaking between concurrent captures.
+    setup, if given, is awaited with each new context (e.g. RoutePolicy.apply);
+    teardown with each context whose worker ran out of work, before it
+    closes (e.g. StorageState.save).
+    """
+
+    def __init__(self, browser, size=DEFAULT_CONCURRENCY, setup=None, teardown=None, **context_kwargs):
+        self.browser = browser
+        self.size = size
+        self.setup = setup
+        self.teardown = teardown
+        self.context_kwargs = context_kwargs
+
+    async def _worker(self, queue, handler, results):
+        context = await self.browser.new_context(**self.context_kwargs)
+        if self.setup:
+            await self.setup(context)
+        page = await context.new_page()
+        try:
+            while True:
+                try:
+                    index, item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                try:
+                    results[index] = await handler(page, item)
+                except Exception as e:
+                    print(f"❌ Worker failed on item {index + 1}: {e}")
+                if page.is_closed():
+                    page = await context.new_page()
+            if self.teardown:
+                await self.teardown(context)
+        finally:
+            await context.close()
+
+    async def map(self, items, handler):
+        """
+        Await handler(page, item) for every item and return the results in
+        input order; items whose handler raised come back as None.
+        """
+        queue = asyncio.Queue()
+        for index, item in enumerate(items):
+            queue.put_nowait((index, item))
+        results = [None] * len(items)
+        workers = min(self.size, len(items))
+        await asyncio.gather(*(self._worker(queue, handler, results) for _ in range(workers)))
+        return results
@@ -0,0 +1,90 @@
+import heapq
+import os
+import tempfile
+
+from m3u_parser import Entry
+
+WRITE_BUFFER = 1024 * 1024
+
+def sort_run(entries):
+    return sorted(entries, key=Entry.sort_key)
+
+def merge_sorted_runs(runs):
+    """
+    Heap-based k-way merge of runs already in Entry.sort_key order.
+    Each entry's key is computed once as it enters the heap, the heap only
+    ever holds one entry per run, and exact duplicates are dropped.
+    """
+    previous = None
+    for entry in heapq.merge(*runs, key=Entry.sort_key):
+        if entry != previous:
+            yield entry
+            previous = entry
+
+class PlaylistWriter:
+    """
+    Streams sorted entries into an #EXTGRP-grouped playlist (or a flat,
+    blank-line separated one with grouped=False). Output goes to a temp
+    file next to the target and is renamed into place on close, so readers
+    never see a half-written playlist.
+    """
+
+    def __init__(self, path, header_lines, grouped=True):
+        self.path = path
+        self.grouped = grouped
+        self.count = 0
+        self.lines = 0
+        self._group = None
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, self._tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".m3u8", dir=directory)
+        self._f = os.fdopen(fd, "w", encoding="utf-8", buffering=WRITE_BUFFER)
+        for line in header_lines:
+            self._writeline(line)
+
+    def _writeline(self, line):
+        self._f.write(line)
+        self._f.write("\n")
+        self.lines += 1
+
+    def write(self, entry, comment=None):
+        if self.grouped:
+            group = entry.group_title or "Other"
+            if group != self._group:
+                self._writeline("")
+                self._writeline(f"#EXTGRP:{group}")
+                self._group = group
+        if comment:
+            self._writeline(f"# {comment}")
+        self._writeline(entry.extinf)
+        for h in entry.headers:
+            self._writeline(h)
+        self._writeline(entry.url)
+        if not self.grouped:
+            self._writeline("")
+        self.count += 1
+
+    def close(self):
+        self._f.close()
+        os.chmod(self._tmp_path, 0o644)
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._f.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def write_sorted_runs(path, header_lines, runs):
+    """Merge pre-sorted runs straight into path; returns the PlaylistWriter for its counts."""
+    with PlaylistWriter(path, header_lines) as writer:
+        for entry in merge_sorted_runs(runs):
+            writer.write(entry)
+    return writer
@@ -4,7 +4,27 @@ import aiohttp
 from datetime import datetime
 import re 
 
+import browser_service
+import hls_validator
+import host_scheduler
+import http_client
+import m3u8_capture
+import validation_cache
+from page_pool import PagePool, concurrency_from_env
+from route_policy import RoutePolicy
+from storage_state import StorageState
+from upstream import upstream_url
+
 API_URL = "https://ppv.to/api/streams"
+# Browser contexts capturing streams in parallel
+PPV_CONCURRENCY = concurrency_from_env("PPV_CONCURRENCY")
+ROUTES = RoutePolicy("PPVLand")
+STATE = StorageState("PPVLand")
+# Seconds to keep listening after the first manifest, so alternates are
+# there to validate, rank and write as backups
+CAPTURE_SETTLE = 5
+# Captures per event when every candidate fails validation
+CAPTURE_ATTEMPTS = 2
 
 CUSTOM_HEADERS = [
     '#EXTVLCOPT:http-origin=https://ppv.to',
@@ -96,117 +116,108 @@ COLLEGE_TEAMS = {
     "arizona state sun devils", "texas tech red raiders", "florida atlantic owls"
 }
 
+def stream_headers(referer):
+    """Headers the player sends for a stream embedded in referer"""
+    return {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:143.0) Gecko/20100101 Firefox/143.0",
+        "Referer": referer,
+        "Origin": "https://" + referer.split('/')[2]
+    }
+
+async def rank_urls(results, referer):
+    """Order working HlsResults fastest first so build_m3u publishes the quickest to start; returns URLs."""
+    ranked = await hls_validator.rank_results(results, stream_headers(referer))
+    for position, result in enumerate(ranked, start=1):
+        print(f"🏁 #{position} {result.total_ms}ms ({result.status}): {result.url}")
+    return [result.url for result in ranked]
+
 async def check_m3u8_url(url, referer):
-    """Checks the M3U8 URL using the correct referer for validation."""
-    
+    """Validates the M3U8 URL with the correct referer; returns its HlsResult, or None on error."""
+
     if "gg.poocloud.in" in url:
-        return True
+        result = hls_validator.HlsResult(url)
+        result.status = hls_validator.LIVE
+        result.detail = "trusted"
+        return result
 
     try:
-        origin = "https://" + referer.split('/')[2]
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:143.0) Gecko/20100101 Firefox/143.0",
-            "Referer": referer,
-            "Origin": origin
-        }
-        timeout = aiohttp.ClientTimeout(total=15)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url, headers=headers) as resp:
-                return resp.status in [200, 403]
+        headers = stream_headers(referer)
+        result = await host_scheduler.get_scheduler().run(
+            url,
+            lambda: hls_validator.validate(url, headers, cache=validation_cache.get_cache()),
+            retries=0,
+            failed=lambda r: r.host_failed,
+        )
+        print(f"🧪 {url}: {result}")
+        return result
     except Exception as e:
         print(f"❌ Error checking {url}: {e}")
-        return False
+        return None
 
 async def get_streams():
+    timeout = aiohttp.ClientTimeout(total=30)
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0'
+    }
+
+    async def fetch():
+        async with http_client.get_session().get(upstream_url(API_URL), headers=headers, timeout=timeout) as resp:
+            print(f"🔍 Response status: {resp.status}")
+            if resp.status != 200:
+                error_text = await resp.text()
+                print(f"❌ Error response: {error_text[:500]}")
+                return None
+            return await resp.json()
+
     try:
-        timeout = aiohttp.ClientTimeout(total=30)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0'
-        }
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            print(f"🌐 Fetching streams from {API_URL}")
-            async with session.get(API_URL) as resp:
-                print(f"🔍 Response status: {resp.status}")
-                if resp.status != 200:
-                    error_text = await resp.text()
-                    print(f"❌ Error response: {error_text[:500]}")
-                    return None
-                return await resp.json()
+        print(f"🌐 Fetching streams from {API_URL}")
+        return await host_scheduler.get_scheduler().run(API_URL, fetch, failed=lambda data: data is None)
     except Exception as e:
         print(f"❌ Error in get_streams: {str(e)}")
         return None
 
 async def grab_m3u8_from_iframe(page, iframe_url):
-    found_streams = set()
-    
-    def handle_response(response):
-        if ".m3u8" in response.url:
-            print(f"✅ Found M3U8 Stream: {response.url}")
-            found_streams.add(response.url)
-
-    page.on("response", handle_response)
-    print(f"🌐 Navigating to iframe: {iframe_url}")
-    try:
-        await page.goto(iframe_url, timeout=40000, wait_until="domcontentloaded") 
-    except Exception as e:
-        print(f"❌ Failed to load iframe page: {e}")
-        page.remove_listener("response", handle_response)
-        return set()
-
-    try:
-        await page.wait_for_timeout(3000)
-        nested_iframe = page.locator("iframe")
-        
-        if await nested_iframe.count() > 0:
-            print("🔎 Found nested iframe, attempting to click inside it.")
-            await page.mouse.click(200, 200) 
-            print("✅ Mouse click dispatched on page center to trigger nested player.")
-            
-        else:
-            print("🖱️ No nested iframe found. Clicking center of page body.")
-            await page.mouse.click(200, 200)
-            
-    except Exception as e:
-        print(f"⚠️ Clicking failed, but proceeding anyway. Error: {e}")
-
-    print("⏳ Waiting for stream to be requested (max 10s)...")
-    try:
-        await page.wait_for_event(
-            "response",
-            lambda resp: ".m3u8" in resp.url,
-            timeout=10000 
-        )
-        print("✅ M3U8 stream detected. Proceeding immediately to validation.")
+    for attempt in range(1, CAPTURE_ATTEMPTS + 1):
+        print(f"🌐 Navigating to iframe: {iframe_url}")
+        try:
+            found_streams = await m3u8_capture.capture(
+                page, iframe_url, goto_timeout=40000, settle=CAPTURE_SETTLE
+            )
+        except Exception as e:
+            print(f"❌ Failed to load iframe page: {e}")
+            return []
+
+        if not found_streams:
+            print(f"❌ No M3U8 URLs were captured for {iframe_url}")
+            return []
+
+        valid = []
+        tasks = [check_m3u8_url(url, iframe_url) for url in found_streams]
+        results = await asyncio.gather(*tasks)
+
+        for url, result in zip(found_streams, results):
+            if result and result.ok:
+                valid.append(result)
+            else:
+                print(f"🗑️ Discarding invalid or unreachable URL: {url}")
 
-    except PlaywrightTimeoutError:
-        print("⚠️ Stream request did not start within 10 seconds. Proceeding to validation.")
-    except Exception as e:
-        print(f"❌ Failed during wait for M3U8 event: {e}")
-
-    page.remove_listener("response", handle_response)
-
-    if not found_streams:
-        print(f"❌ No M3U8 URLs were captured for {iframe_url}")
-        return set()
-
-    valid_urls = set()
-    tasks = [check_m3u8_url(url, iframe_url) for url in found_streams]
-    results = await asyncio.gather(*tasks)
-    
-    for url, is_valid in zip(found_streams, results):
-        if is_valid:
-            valid_urls.add(url)
-        else:
-            print(f"🗑️ Discarding invalid or unreachable URL: {url}")
-            
-    return valid_urls
+        # Fresh validations already carry timings; only cache hits are measured again
+        valid_urls = await rank_urls(valid, iframe_url) if len(valid) > 1 else [r.url for r in valid]
+        if valid_urls:
+            return valid_urls
+        if attempt < CAPTURE_ATTEMPTS:
+            print(f"🔁 Every captured URL failed validation, capturing again ({attempt + 1}/{CAPTURE_ATTEMPTS})")
+    return []
 
 async def grab_live_now_from_html(page, base_url="https://ppv.to/"):
     print("🌐 Scraping 'Live Now' streams from HTML...")
     live_now_streams = []
     try:
-        await page.goto(base_url, timeout=20000)
-        await asyncio.sleep(3)
+        await host_scheduler.get_scheduler().goto(page, base_url, timeout=20000)
+        try:
+            await page.wait_for_selector("#livecards a.item-card", timeout=5000)
+        except PlaywrightTimeoutError:
+            pass
 
         live_cards = await page.query_selector_all("#livecards a.item-card")
         for card in live_cards:
@@ -266,7 +277,7 @@ def build_m3u(streams, url_map):
                         matched_team = team
                         break
 
-        url = next(iter(urls))
+        url = urls[0]
         lines.append(f'#EXTINF:-1 tvg-id="{tvg_id}" tvg-logo="{logo}" group-title="{final_group}",{s["name"]}')
         lines.extend(CUSTOM_HEADERS)
         lines.append(url)
@@ -309,33 +320,37 @@ async def main():
     streams = deduped_streams
 
     async with async_playwright() as p:
-        browser = await p.firefox.launch(headless=True)
-        context = await browser.new_context()
+        browser = await browser_service.launch(p, headless=True)
+        context = await ROUTES.apply(await browser.new_context(**STATE.context_options()))
         page = await context.new_page()
-        url_map = {}
+        live_now_streams = await grab_live_now_from_html(page)
+        await STATE.save(context)
+        await context.close()
 
+        streams.extend(live_now_streams)
         total_streams = len(streams)
-        for idx, s in enumerate(streams, start=1):
-            key = f"{s['name']}::{s['category']}::{s['iframe']}"
-            print(f"\n🔎 Scraping stream {idx}/{total_streams}: {s['name']} ({s['category']})")
-            urls = await grab_m3u8_from_iframe(page, s["iframe"])
-            if urls:
-                print(f"✅ Got {len(urls)} stream(s) for {s['name']} ({idx}/{total_streams})")
-            else:
-                print(f"⚠️ No valid streams for {s['name']} ({idx}/{total_streams})")
-            url_map[key] = urls
+        done = 0
 
-        live_now_streams = await grab_live_now_from_html(page)
-        for s in live_now_streams:
-            key = f"{s['name']}::{s['category']}::{s['iframe']}"
+        async def scrape(page, s):
+            nonlocal done
+            print(f"\n🔎 Scraping stream: {s['name']} ({s['category']})")
             urls = await grab_m3u8_from_iframe(page, s["iframe"])
+            done += 1
             if urls:
-                print(f"✅ Got {len(urls)} 'Live Now' stream(s) for {s['name']}")
+                print(f"✅ Got {len(urls)} stream(s) for {s['name']} ({done}/{total_streams})")
             else:
-                print(f"⚠️ No valid 'Live Now' streams for {s['name']}")
-            url_map[key] = urls
-        streams.extend(live_now_streams)
+                print(f"⚠️ No valid streams for {s['name']} ({done}/{total_streams})")
+            return urls
+
+        print(f"\n🧵 Scraping {total_streams} streams with {PPV_CONCURRENCY} workers")
+        pool = PagePool(browser, PPV_CONCURRENCY, setup=ROUTES.apply, teardown=STATE.save, **STATE.context_options())
+        results = await pool.map(streams, scrape)
+        url_map = {
+            f"{s['name']}::{s['category']}::{s['iframe']}": urls or []
+            for s, urls in zip(streams, results)
+        }
 
+        await ROUTES.drain()
         await browser.close()
 
     print("\n💾 Writing final playlist to PPVLand.m3u8 ...")
@@ -345,4 +360,9 @@ async def main():
     print(f"✅ Done! Playlist saved as PPVLand.m3u8 at {datetime.utcnow().isoformat()} UTC")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        http_client.run(main())
+    finally:
+        validation_cache.close_cache()
+        host_scheduler.get_scheduler().report()
+        ROUTES.report()
@@ -6,7 +6,29 @@ from datetime import datetime
 import re
 import urllib.parse
 
+import browser_service
+import hls_validator
+import host_scheduler
+import http_client
+import m3u8_capture
+import validation_cache
+from page_pool import PagePool, concurrency_from_env
+from route_policy import RoutePolicy
+from storage_state import StorageState
+from upstream import upstream_url
+
 API_URL = "https://ppv.to/api/streams"
+# Slower working URLs per event, fastest first, for players to fail over to
+BACKUP_FILE = "PPVLand_backup.m3u8"
+# Browser contexts capturing streams in parallel
+PPV_CONCURRENCY = concurrency_from_env("PPV_CONCURRENCY")
+ROUTES = RoutePolicy("PPVLand")
+STATE = StorageState("PPVLand")
+# Seconds to keep listening after the first manifest, so alternates are
+# there to validate, rank and write as backups
+CAPTURE_SETTLE = 5
+# Captures per event when every candidate fails validation
+CAPTURE_ATTEMPTS = 2
 
 CUSTOM_HEADERS = [
     '#EXTVLCOPT:http-origin=https://ppv.to',
@@ -101,117 +123,95 @@ COLLEGE_TEAMS = {
 
 
 async def grab_m3u8_from_iframe(page, iframe_url):
-    found_streams = set()
-    
-    def handle_response(response):
-        if ".m3u8" in response.url:
-            print(f"✅ Found M3U8 Stream: {response.url}")
-            found_streams.add(response.url)
-
-    page.on("response", handle_response)
-    print(f"🌐 Navigating to iframe: {iframe_url}")
-    
-    try:
-        # Try loading with domcontentloaded first
-        await page.goto(iframe_url, timeout=120000, wait_until="domcontentloaded")
-        print("✅ Page loaded (domcontentloaded)")
-        await page.wait_for_load_state("networkidle", timeout=60000)
-        print("✅ Network idle detected")
-    except Exception as e:
-        print(f"❌ Failed to load iframe page: {e}")
+    for attempt in range(1, CAPTURE_ATTEMPTS + 1):
+        print(f"🌐 Navigating to iframe: {iframe_url}")
         try:
-            # Try alternative loading method
-            await page.wait_for_load_state("load", timeout=60000)
-            print("✅ Page loaded (load state)")
-        except:
-            pass
-        page.remove_listener("response", handle_response)
-        return set()
-
-    # Wait for content to fully load
-    await asyncio.sleep(5)
-    
-    # Try multiple interaction methods
-    try:
-        # Try clicking on the page to trigger any dynamic content
-        await page.click("body", timeout=5000)
-        print("✅ Clicked on page body to trigger content")
-    except:
-        pass
-        
-    # Wait for more content to load
-    await asyncio.sleep(5)
-
-    print("⏳ Waiting for stream to be requested (max 25s)...")
-    try:
-        await page.wait_for_event(
-            "response",
-            lambda resp: ".m3u8" in resp.url,
-            timeout=25000
-        )
-        print("✅ M3U8 stream detected. Proceeding immediately to validation.")
-    except PlaywrightTimeoutError:
-        print("⚠️ Stream request did not start within 25 seconds. Checking for streams anyway...")
-    except Exception as e:
-        print(f"❌ Failed during wait for M3U8 event: {e}")
-
-    # Give it a bit more time to capture any late-loading streams
-    await asyncio.sleep(3)
-
-    page.remove_listener("response", handle_response)
-
-    if not found_streams:
-        print(f"❌ No M3U8 URLs were captured for {iframe_url}")
-        return set()
-
-    valid_urls = set()
-    tasks = [check_m3u8_url(url, iframe_url) for url in found_streams]
-    results = await asyncio.gather(*tasks)
-    
-    for url, is_valid in zip(found_streams, results):
-        if is_valid:
-            valid_urls.add(url)
-        else:
-            print(f"🗑️ Discarding invalid or unreachable URL: {url}")
-            
-    return valid_urls
+            found_streams = await m3u8_capture.capture(
+                page, iframe_url, goto_timeout=120000, settle=CAPTURE_SETTLE
+            )
+        except Exception as e:
+            print(f"❌ Failed to load iframe page: {e}")
+            return []
+
+        if not found_streams:
+            print(f"❌ No M3U8 URLs were captured for {iframe_url}")
+            return []
+
+        valid = []
+        tasks = [check_m3u8_url(url, iframe_url) for url in found_streams]
+        results = await asyncio.gather(*tasks)
+
+        for url, result in zip(found_streams, results):
+            if result and result.ok:
+                valid.append(result)
+            else:
+                print(f"🗑️ Discarding invalid or unreachable URL: {url}")
+
+        # Fresh validations already carry timings; only cache hits are measured again
+        valid_urls = await rank_urls(valid, iframe_url) if len(valid) > 1 else [r.url for r in valid]
+        if valid_urls:
+            return valid_urls
+        if attempt < CAPTURE_ATTEMPTS:
+            print(f"🔁 Every captured URL failed validation, capturing again ({attempt + 1}/{CAPTURE_ATTEMPTS})")
+    return []
+
+def stream_headers(referer):
+    """Headers the player sends for a stream embedded in referer"""
+    origin = "https://" + referer.split('/')[2] if referer else "https://ppv.to"
+    return {
+        "User-Agent": DEFAULT_UA,
+        "Referer": referer,
+        "Origin": origin
+    }
+
+async def rank_urls(results, referer):
+    """Order working HlsResults fastest first so the primary entry starts quickest; returns URLs."""
+    ranked = await hls_validator.rank_results(results, stream_headers(referer))
+    for position, result in enumerate(ranked, start=1):
+        print(f"🏁 #{position} {result.total_ms}ms ({result.status}): {result.url}")
+    return [result.url for result in ranked]
 
 async def check_m3u8_url(url, referer):
-    """Checks the M3U8 URL using the correct referer for validation."""
-    
+    """Validates the M3U8 URL with the correct referer; returns its HlsResult, or None on error."""
+
     if "gg.poocloud.in" in url:
-        return True
+        result = hls_validator.HlsResult(url)
+        result.status = hls_validator.LIVE
+        result.detail = "trusted"
+        return result
 
     try:
-        origin = "https://" + referer.split('/') if referer else "https://ppv.to"
-        headers = {
-            "User-Agent": DEFAULT_UA,
-            "Referer": referer,
-            "Origin": origin
-        }
-        timeout = aiohttp.ClientTimeout(total=15)
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            async with session.get(url, headers=headers) as resp:
-                return resp.status in [200, 403]
+        headers = stream_headers(referer)
+        result = await host_scheduler.get_scheduler().run(
+            url,
+            lambda: hls_validator.validate(url, headers, cache=validation_cache.get_cache()),
+            retries=0,
+            failed=lambda r: r.host_failed,
+        )
+        print(f"🧪 {url}: {result}")
+        return result
     except Exception as e:
         print(f"❌ Error checking {url}: {e}")
-        return False
+        return None
 
 async def get_streams():
+    timeout = aiohttp.ClientTimeout(total=30)
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0'
+    }
+
+    async def fetch():
+        async with http_client.get_session().get(upstream_url(API_URL), headers=headers, timeout=timeout) as resp:
+            print(f"🔍 Response status: {resp.status}")
+            if resp.status != 200:
+                error_text = await resp.text()
+                print(f"❌ Error response: {error_text[:500]}")
+                return None
+            return await resp.json()
+
     try:
-        timeout = aiohttp.ClientTimeout(total=30)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0'
-        }
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            print(f"🌐 Fetching streams from {API_URL}")
-            async with session.get(API_URL) as resp:
-                print(f"🔍 Response status: {resp.status}")
-                if resp.status != 200:
-                    error_text = await resp.text()
-                    print(f"❌ Error response: {error_text[:500]}")
-                    return None
-                return await resp.json()
+        print(f"🌐 Fetching streams from {API_URL}")
+        return await host_scheduler.get_scheduler().run(API_URL, fetch, failed=lambda data: data is None)
     except Exception as e:
         print(f"❌ Error in get_streams: {str(e)}")
         return None
@@ -221,8 +221,11 @@ async def grab_live_now_from_html(page, base_url="https://ppv.to/"):
     print("🌐 Scraping 'Live Now' streams from HTML...")
     live_now_streams = []
     try:
-        await page.goto(base_url, timeout=20000)
-        await asyncio.sleep(3)
+        await host_scheduler.get_scheduler().goto(page, base_url, timeout=20000)
+        try:
+            await page.wait_for_selector("#livecards a.item-card", timeout=5000)
+        except PlaywrightTimeoutError:
+            pass
 
         live_cards = await page.query_selector_all("#livecards a.item-card")
         for card in live_cards:
@@ -250,11 +253,13 @@ def _encode_param(value: str) -> str:
     """Percent-encode a header value for use in the pipe params"""
     return urllib.parse.quote(value or "", safe='')
 
-def build_m3u(streams, url_map):
+def build_m3u(streams, url_map, backups=False):
     """
     Build M3U formatted output compatible with Kodi-style playlist entries.
     For each stream we append a single best URL followed by pipe-separated,
     percent-encoded header params: |User-Agent=...&Referer=...&Origin=...
+    URLs arrive fastest first; with backups=True the playlist instead holds
+    every slower URL, in order, as "<name> (Backup N)" entries.
     """
     lines = ['#EXTM3U url-tvg="https://epgshare01.online/epgshare01/epg_ripper_DUMMY_CHANNELS.xml.gz"']
     seen_names = set()
@@ -267,7 +272,8 @@ def build_m3u(streams, url_map):
         unique_key = f"{s['name']}::{s['category']}::{s['iframe']}"
         urls = url_map.get(unique_key, [])
         if not urls:
-            print(f"⚠️ No working URLs for {s['name']}")
+            if not backups:
+                print(f"⚠️ No working URLs for {s['name']}")
             continue
 
         orig_category = s.get("category") or "Misc"
@@ -291,8 +297,11 @@ def build_m3u(streams, url_map):
                         matched_team = team
                         break
 
-        # Pick the first available URL
-        url = next(iter(urls))
+        # The fastest URL is the primary, the rest are backups
+        if backups:
+            entries = [(f'{s["name"]} (Backup {n})', url) for n, url in enumerate(urls[1:], start=1)]
+        else:
+            entries = [(s["name"], urls[0])]
 
         # Build the pipe-appended, percent-encoded header params
         try:
@@ -307,9 +316,10 @@ def build_m3u(streams, url_map):
 
         param_str = f"|User-Agent={ua_enc}&Referer={ref_enc}&Origin={origin_enc}"
 
-        lines.append(f'#EXTINF:-1 tvg-id="{tvg_id}" tvg-logo="{logo}" group-title="{final_group}",{s["name"]}')
-        # append the single URL with the pipe-encoded header params (Kodi-style)
-        lines.append(f'{url}{param_str}')
+        for title, url in entries:
+            lines.append(f'#EXTINF:-1 tvg-id="{tvg_id}" tvg-logo="{logo}" group-title="{final_group}",{title}')
+            # append the single URL with the pipe-encoded header params (Kodi-style)
+            lines.append(f'{url}{param_str}')
     return "\n".join(lines)
 
 async def main():
@@ -349,62 +359,55 @@ async def main():
     streams = deduped_streams
 
     async with async_playwright() as p:
-        browser = await p.firefox.launch(
+        browser = await browser_service.launch(
+            p,
             headless=True,
             firefox_user_prefs={
                 "media.autoplay.default": 0,
                 "media.autoplay.blocking_policy": 0
             }
         )
-        context = await browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:143.0) Gecko/20100101 Firefox/143.0',
-            locale='en-US',
-            timezone_id='America/New_York'
-        )
+        context_options = {
+            "viewport": {'width': 1920, 'height': 1080},
+            "user_agent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:143.0) Gecko/20100101 Firefox/143.0',
+            "locale": 'en-US',
+            "timezone_id": 'America/New_York'
+        }
+        context = await ROUTES.apply(await browser.new_context(**context_options, **STATE.context_options()))
         page = await context.new_page()
-        url_map = {}
+        live_now_streams = await grab_live_now_from_html(page)
+        await STATE.save(context)
+        await context.close()
 
+        streams.extend(live_now_streams)
         total_streams = len(streams)
-        for idx, s in enumerate(streams, start=1):
-            key = f"{s['name']}::{s['category']}::{s['iframe']}"
-            print(f"\n🔎 Scraping stream {idx}/{total_streams}: {s['name']} ({s['category']})")
-            try:
-                urls = await grab_m3u8_from_iframe(page, s["iframe"])
-                if urls:
-                    print(f"✅ Got {len(urls)} stream(s) for {s['name']} ({idx}/{total_streams})")
-                    url_map[key] = urls
-                else:
-                    print(f"⚠️ No valid streams for {s['name']} ({idx}/{total_streams})")
-                    url_map[key] = set()
-            except Exception as e:
-                print(f"❌ Critical error for {s['name']}: {e}")
-                url_map[key] = set()
-            finally:
-                if idx < total_streams:
-                    await asyncio.sleep(2)  # Delay between requests to avoid rate limiting
+        done = 0
 
-        live_now_streams = await grab_live_now_from_html(page)
-        for s in live_now_streams:
-            key = f"{s['name']}::{s['category']}::{s['iframe']}"
-            print(f"\n🔎 Scraping 'Live Now' stream {idx+1}/{total_streams}: {s['name']} ({s['category']})")
+        async def scrape(page, s):
+            nonlocal done
+            print(f"\n🔎 Scraping stream: {s['name']} ({s['category']})")
             try:
                 urls = await grab_m3u8_from_iframe(page, s["iframe"])
-                if urls:
-                    print(f"✅ Got {len(urls)} 'Live Now' stream(s) for {s['name']}")
-                    url_map[key] = urls
-                else:
-                    print(f"⚠️ No valid 'Live Now' streams for {s['name']}")
-                    url_map[key] = set()
             except Exception as e:
                 print(f"❌ Critical error for {s['name']}: {e}")
-                url_map[key] = set()
-            finally:
-                if idx < total_streams:
-                    await asyncio.sleep(2)  # Delay between requests to avoid rate limiting
-
-        streams.extend(live_now_streams)
+                urls = []
+            done += 1
+            if urls:
+                print(f"✅ Got {len(urls)} stream(s) for {s['name']} ({done}/{total_streams})")
+            else:
+                print(f"⚠️ No valid streams for {s['name']} ({done}/{total_streams})")
+            return urls
+
+        print(f"\n🧵 Scraping {total_streams} streams with {PPV_CONCURRENCY} workers")
+        pool = PagePool(browser, PPV_CONCURRENCY, setup=ROUTES.apply, teardown=STATE.save,
+                        **context_options, **STATE.context_options())
+        results = await pool.map(streams, scrape)
+        url_map = {
+            f"{s['name']}::{s['category']}::{s['iframe']}": urls or []
+            for s, urls in zip(streams, results)
+        }
 
+        await ROUTES.drain()
         await browser.close()
 
     print("\n💾 Writing final playlist to PPVLand.m3u8 ...")
@@ -412,6 +415,10 @@ async def main():
     with open("PPVLand.m3u8", "w", encoding="utf-8") as f:
         f.write(playlist)
     print(f"✅ Done! Playlist saved as PPVLand.m3u8 at {datetime.utcnow().isoformat()} UTC")
+
+    print(f"\n💾 Writing backup URLs to {BACKUP_FILE} ...")
+    with open(BACKUP_FILE, "w", encoding="utf-8") as f:
+        f.write(build_m3u(streams, url_map, backups=True))
     
     # NEW: Write VLC-compatible file
     print("\n💾 Writing VLC-compatible playlist to PPVLand_vlc.m3u8 ...")
@@ -450,8 +457,8 @@ async def main():
                         matched_team = team
                         break
 
-        # Pick the first available URL
-        url = next(iter(urls))
+        # Pick the fastest URL
+        url = urls[0]
 
         # Build the VLC-compatible header parameters
         try:
@@ -475,428 +482,9 @@ async def main():
     print(f"✅ Done! VLC-compatible playlist saved as PPVLand_vlc.m3u8 at {datetime.utcnow().isoformat()} UTC")
 
 if __name__ == "__main__":
-    asyncio.run(main())
-
-CATEGORY_TVG_IDS = {
-    "24/7 Streams": "24.7.Dummy.us",
-    "Wrestling": "PPV.EVENTS.Dummy.us",
-    "Football": "Soccer.Dummy.us",
-    "Basketball": "Basketball.Dummy.us",
-    "Baseball": "MLB.Baseball.Dummy.us",
-    "American Football": "NFL.Dummy.us",
-    "Combat Sports": "PPV.EVENTS.Dummy.us",
-    "Darts": "Darts.Dummy.us",
-    "Motorsports": "Racing.Dummy.us",
-    "Live Now": "24.7.Dummy.us",
-    "Ice Hockey": "NHL.Hockey.Dummy.us",
-    "Miscellaneous": "24.7.Dummy.us"
-}
-
-GROUP_RENAME_MAP = {
-    "24/7 Streams": "PPVLand - Live Channels 24/7",
-    "Wrestling": "PPVLand - Wrestling Events",
-    "Football": "PPVLand - Global Football Streams",
-    "Basketball": "PPVLand - Basketball Hub",
-    "Baseball": "PPVLand - MLB",
-    "American Football": "PPVLand - NFL Action",
-    "Combat Sports": "PPVLand - Combat Sports",
-    "Darts": "PPVLand - Darts",
-    "Motorsports": "PPVLand - Racing Action",
-    "Live Now": "PPVLand - Live Now",
-    "Ice Hockey": "PPVLand - NHL Action",
-    "Miscellaneous": "PPVLand - Random Events"
-}
-
-NFL_TEAMS = {
-    "arizona cardinals", "atlanta falcons", "baltimore ravens", "buffalo bills",
-    "carolina panthers", "chicago bears", "cincinnati bengals", "cleveland browns",
-    "dallas cowboys", "denver broncos", "detroit lions", "green bay packers",
-    "houston texans", "indianapolis colts", "jacksonville jaguars", "kansas city chiefs",
-    "las vegas raiders", "los angeles chargers", "los angeles rams", "miami dolphins",
-    "minnesota vikings", "new england patriots", "new orleans saints", "new york giants",
-    "new york jets", "philadelphia eagles", "pittsburgh steelers", "san francisco 49ers",
-    "seattle seahawks", "tampa bay buccaneers", "tennessee titans", "washington commanders"
-}
-
-COLLEGE_TEAMS = {
-    "alabama crimson tide", "auburn tigers", "arkansas razorbacks", "georgia bulldogs",
-    "florida gators", "lsu tigers", "ole miss rebels", "mississippi state bulldogs",
-    "tennessee volunteers", "texas longhorns", "oklahoma sooners", "oklahoma state cowboys",
-    "baylor bears", "tcu horned frogs", "kansas jayhawks", "kansas state wildcats",
-    "iowa state cyclones", "iowa hawkeyes", "michigan wolverines", "ohio state buckeyes",
-    "penn state nittany lions", "michigan state spartans", "wisconsin badgers",
-    "minnesota golden gophers", "illinois fighting illini", "northwestern wildcats",
-    "indiana hoosiers", "notre dame fighting irish", "usc trojans", "ucla bruins",
-    "oregon ducks", "oregon state beavers", "washington huskies", "washington state cougars",
-    "arizona wildcats", "stanford cardinal", "california golden bears", "colorado buffaloes",
-    "florida state seminoles", "miami hurricanes", "clemson tigers", "north carolina tar heels",
-    "duke blue devils", "nc state wolfpack", "wake forest demon deacons", "syracuse orange",
-    "virginia cavaliers", "virginia tech hokies", "louisville cardinals", "pittsburgh panthers",
-    "maryland terrapins", "rutgers scarlet knights", "nebraska cornhuskers", "purdue boilermakers",
-    "texas a&m aggies", "kentucky wildcats", "missouri tigers", "vanderbilt commodores",
-    "houston cougars", "utah utes", "byu cougars", "boise state broncos", "san diego state aztecs",
-    "cincinnati bearcats", "memphis tigers", "ucf knights", "south florida bulls", "smu mustangs",
-    "tulsa golden hurricane", "tulane green wave", "navy midshipmen", "army black knights",
-    "arizona state sun devils", "texas tech red raiders", "florida atlantic owls"
-}
-
-
-async def grab_m3u8_from_iframe(page, iframe_url):
-    found_streams = set()
-    
-    def handle_response(response):
-        if ".m3u8" in response.url:
-            print(f"✅ Found M3U8 Stream: {response.url}")
-            found_streams.add(response.url)
-
-    page.on("response", handle_response)
-    print(f"🌐 Navigating to iframe: {iframe_url}")
-    
-    try:
-        # Try loading with domcontentloaded first
-        await page.goto(iframe_url, timeout=120000, wait_until="domcontentloaded")
-        print("✅ Page loaded (domcontentloaded)")
-        await page.wait_for_load_state("networkidle", timeout=60000)
-        print("✅ Network idle detected")
-    except Exception as e:
-        print(f"❌ Failed to load iframe page: {e}")
-        try:
-            # Try alternative loading method
-            await page.wait_for_load_state("load", timeout=60000)
-            print("✅ Page loaded (load state)")
-        except:
-            pass
-        page.remove_listener("response", handle_response)
-        return set()
-
-    # Wait for content to fully load
-    await asyncio.sleep(5)
-    
-    # Try multiple interaction methods
-    try:
-        # Try clicking on the page to trigger any dynamic content
-        await page.click("body", timeout=5000)
-        print("✅ Clicked on page body to trigger content")
-    except:
-        pass
-        
-    # Wait for more content to load
-    await asyncio.sleep(5)
-
-    print("⏳ Waiting for stream to be requested (max 25s)...")
-    try:
-        await page.wait_for_event(
-            "response",
-            lambda resp: ".m3u8" in resp.url,
-            timeout=25000
-        )
-        print("✅ M3U8 stream detected. Proceeding immediately to validation.")
-    except PlaywrightTimeoutError:
-        print("⚠️ Stream request did not start within 25 seconds. Checking for streams anyway...")
-    except Exception as e:
-        print(f"❌ Failed during wait for M3U8 event: {e}")
-
-    # Give it a bit more time to capture any late-loading streams
-    await asyncio.sleep(3)
-
-    page.remove_listener("response", handle_response)
-
-    if not found_streams:
-        print(f"❌ No M3U8 URLs were captured for {iframe_url}")
-        return set()
-
-    valid_urls = set()
-    tasks = [check_m3u8_url(url, iframe_url) for url in found_streams]
-    results = await asyncio.gather(*tasks)
-    
-    for url, is_valid in zip(found_streams, results):
-        if is_valid:
-            valid_urls.add(url)
-        else:
-            print(f"🗑️ Discarding invalid or unreachable URL: {url}")
-            
-    return valid_urls
-
-async def check_m3u8_url(url, referer):
-    """Checks the M3U8 URL using the correct referer for validation."""
-    
-    if "gg.poocloud.in" in url:
-        return True
-
-    try:
-        origin = "https://" + referer.split('/') if referer else "https://ppv.to"
-        headers = {
-            "User-Agent": DEFAULT_UA,
-            "Referer": referer,
-            "Origin": origin
-        }
-        timeout = aiohttp.ClientTimeout(total=15)
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            async with session.get(url, headers=headers) as resp:
-                return resp.status in [200, 403]
-    except Exception as e:
-        print(f"❌ Error checking {url}: {e}")
-        return False
-
-async def get_streams():
-    try:
-        timeout = aiohttp.ClientTimeout(total=30)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0'
-        }
-        async with aiohttp.ClientSession(timeout=timeout, headers=headers) as session:
-            print(f"🌐 Fetching streams from {API_URL}")
-            async with session.get(API_URL) as resp:
-                print(f"🔍 Response status: {resp.status}")
-                if resp.status != 200:
-                    error_text = await resp.text()
-                    print(f"❌ Error response: {error_text[:500]}")
-                    return None
-                return await resp.json()
-    except Exception as e:
-        print(f"❌ Error in get_streams: {str(e)}")
-        return None
-
-    
-async def grab_live_now_from_html(page, base_url="https://ppv.to/"):
-    print("🌐 Scraping 'Live Now' streams from HTML...")
-    live_now_streams = []
     try:
-        await page.goto(base_url, timeout=20000)
-        await asyncio.sleep(3)
-
-        live_cards = await page.query_selector_all("#livecards a.item-card")
-        for card in live_cards:
-            href = await card.get_attribute("href")
-            name_el = await card.query_selector(".card-title")
-            poster_el = await card.query_selector("img.card-img-top")
-            name = await name_el.inner_text() if name_el else "Unnamed Live"
-            poster = await poster_el.get_attribute("src") if poster_el else None
-
-            if href:
-                iframe_url = f"{base_url.rstrip('/')}{href}"
-                live_now_streams.append({
-                    "name": name.strip(),
-                    "iframe": iframe_url,
-                    "category": "Live Now",
-                    "poster": poster
-                })
-    except Exception as e:
-        print(f"❌ Failed scraping 'Live Now': {e}")
-
-    print(f"✅ Found {len(live_now_streams)} 'Live Now' streams")
-    return live_now_streams
-
-def _encode_param(value: str) -> str:
-    """Percent-encode a header value for use in the pipe params"""
-    return urllib.parse.quote(value or "", safe='')
-
-def build_m3u(streams, url_map):
-    """
-    Build M3U formatted output compatible with Kodi-style playlist entries.
-    For each stream we append a single best URL followed by pipe-separated,
-    percent-encoded header params: |User-Agent=...&Referer=...&Origin=...
-    """
-    lines = ['#EXTM3U url-tvg="https://epgshare01.online/epgshare01/epg_ripper_DUMMY_CHANNELS.xml.gz"']
-    seen_names = set()
-    for s in streams:
-        name_lower = s["name"].strip().lower()
-        if name_lower in seen_names:
-            continue
-        seen_names.add(name_lower)
-
-        unique_key = f"{s['name']}::{s['category']}::{s['iframe']}"
-        urls = url_map.get(unique_key, [])
-        if not urls:
-            print(f"⚠️ No working URLs for {s['name']}")
-            continue
-
-        orig_category = s.get("category") or "Misc"
-        final_group = GROUP_RENAME_MAP.get(orig_category, f"PPVLand - {orig_category}")
-        logo = s.get("poster") or CATEGORY_LOGOS.get(orig_category, "http://drewlive24.duckdns.org:9000/Logos/Default.png")
-        tvg_id = CATEGORY_TVG_IDS.get(orig_category, "Misc.Dummy.us")
-
-        if orig_category == "American Football":
-            matched_team = None
-            for team in NFL_TEAMS:
-                if team in name_lower:
-                    tvg_id = "NFL.Dummy.us"
-                    final_group = "PPVLand - NFL Action"
-                    matched_team = team
-                    break
-            if not matched_team:
-                for team in COLLEGE_TEAMS:
-                    if team in name_lower:
-                        tvg_id = "NCAA.Football.Dummy.us"
-                        final_group = "PPVLand - College Football"
-                        matched_team = team
-                        break
-
-        # Pick the first available URL
-        url = next(iter(urls))
-
-        # Build the pipe-appended, percent-encoded header params
-        try:
-            referer = s.get("iframe") or ""
-            origin = "https://" + referer.split('/') if referer else "https://ppv.to"
-        except Exception:
-            origin = "https://ppv.to"
-
-        ua_enc = _encode_param(DEFAULT_UA)
-        ref_enc = _encode_param(referer)
-        origin_enc = _encode_param(origin)
-
-        param_str = f"|User-Agent={ua_enc}&Referer={ref_enc}&Origin={origin_enc}"
-
-        lines.append(f'#EXTINF:-1 tvg-id="{tvg_id}" tvg-logo="{logo}" group-title="{final_group}",{s["name"]}')
-        # append the single URL with the pipe-encoded header params (Kodi-style)
-        lines.append(f'{url}{param_str}')
-    return "\n".join(lines)
-
-async def main():
-    print("🚀 Starting PPV Stream Fetcher")
-    data = await get_streams()
-    if not data or 'streams' not in data:
-        print("❌ No valid data received from the API")
-        if data:
-            print(f"API Response: {data}")
-        return
-
-    print(f"✅ Found {len(data['streams'])} categories")
-    streams = []
-    for category in data.get("streams", []):
-        cat = category.get("category", "").strip() or "Misc"
-        if cat not in ALLOWED_CATEGORIES:
-            ALLOWED_CATEGORIES.add(cat)
-        for stream in category.get("streams", []):
-            iframe = stream.get("iframe") 
-            name = stream.get("name", "Unnamed Event")
-            poster = stream.get("poster")
-            if iframe:
-                streams.append({
-                    "name": name,
-                    "iframe": iframe,
-                    "category": cat,
-                    "poster": poster
-                })
-
-    seen_names = set()
-    deduped_streams = []
-    for s in streams:
-        name_key = s["name"].strip().lower()
-        if name_key not in seen_names:
-            seen_names.add(name_key)
-            deduped_streams.append(s)
-    streams = deduped_streams
-
-    async with async_playwright() as p:
-        browser = await p.firefox.launch(
-            headless=True,
-            firefox_user_prefs={
-                "media.autoplay.default": 0,
-                "media.autoplay.blocking_policy": 0
-            }
-        )
-        context = await browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:143.0) Gecko/20100101 Firefox/143.0',
-            locale='en-US',
-            timezone_id='America/New_York'
-        )
-        page = await context.new_page()
-        url_map = {}
-
-        total_streams = len(streams)
-        for idx, s in enumerate(streams, start=1):
-            key = f"{s['name']}::{s['category']}::{s['iframe']}"
-            print(f"\n🔎 Scraping stream {idx}/{total_streams}: {s['name']} ({s['category']})")
-            try:
-                urls = await grab_m3u8_from_iframe(page, s["iframe"])
-                if urls:
-                    print(f"✅ Got {len(urls)} stream(s) for {s['name']} ({idx}/{total_streams})")
-                    url_map[key] = urls
-                else:
-                    print(f"⚠️ No valid streams for {s['name']} ({idx}/{total_streams})")
-                    url_map[key] = set()
-            except Exception as e:
-                print(f"❌ Critical error for {s['name']}: {e}")
-                url_map[key] = set()
-            finally:
-                if idx < total_streams:
-                    await asyncio.sleep(2)  # Delay between requests to avoid rate limiting
-
-        live_now_streams = await grab_live_now_from_html(page)
-        for s in live_now_streams:
-            key = f"{s['name']}::{s['category']}::{s['iframe']}"
-            print(f"\n🔎 Scraping 'Live Now' stream {idx+1}/{total_streams}: {s['name']} ({s['category']})")
-            try:
-                urls = await grab_m3u8_from_iframe(page, s["iframe"])
-                if urls:
-                    print(f"✅ Got {len(urls)} 'Live Now' stream(s) for {s['name']}")
-                    url_map[key] = urls
-                else:
-                    print(f"⚠️ No valid 'Live Now' streams for {s['name']}")
-                    url_map[key] = set()
-            except Exception as e:
-                print(f"❌ Critical error for {s['name']}: {e}")
-                url_map[key] = set()
-            finally:
-                if idx < total_streams:
-                    await asyncio.sleep(2)  # Delay between requests to avoid rate limiting
-
-        streams.extend(live_now_streams)
-
-        await browser.close()
-
-    print("\n💾 Writing final playlist to PPVLand.m3u8 ...")
-    playlist = build_m3u(streams, url_map)
-    with open("PPVLand.m3u8", "w", encoding="utf-8") as f:
-        f.write(playlist)
-    print(f"✅ Done! Playlist saved as PPVLand.m3u8 at {datetime.utcnow().isoformat()} UTC")
-    
-    # NEW: Write VLC-compatible file
-    print("\n💾 Writing VLC-compatible playlist to PPVLand_vlc.m3u8 ...")
-    vlc_lines = ['#EXTM3U']
-    seen_names = set()
-    for s in streams:
-        name_lower = s["name"].strip().lower()
-        if name_lower in seen_names:
-            continue
-        seen_names.add(name_lower)
-
-        unique_key = f"{s['name']}::{s['category']}::{s['iframe']}"
-        urls = url_map.get(unique_key, [])
-        if not urls:
-            print(f"⚠️ No working URLs for {s['name']}")
-            continue
-
-        orig_category = s.get("category") or "Misc"
-        final_group = GROUP_RENAME_MAP.get(orig_category, f"PPVLand - {orig_category}")
-        logo = s.get("poster") or CATEGORY_LOGOS.get(orig_category, "http://drewlive24.duckdns.org:9000/Logos/Default.png")
-        tvg_id = CATEGORY_TVG_IDS.get(orig_category, "Misc.Dummy.us")
-
-        if orig_category == "American Football":
-            matched_team = None
-            for team in NFL_TEAMS:
-                if team in name_lower:
-                    tvg_id = "NFL.Dummy.us"
-                    final_group = "PPVLand - NFL Action"
-                    matched_team = team
-                    break
-            if not matched_team:
-                for team in COLLEGE_TEAMS:
-                    if team in name_lower:
-                        tvg_id = "NCAA.Football.Dummy.us"
-                        final_group = "PPVLand - College Football"
-                        matched_team = team
-                        break
-
-        # Pick the first available URL
-        url = next(iter(urls))
-    
-    with open("PPVLand_vlc.m3u8", "w", encoding="utf-8") as f:
-        f.write("\n".join(vlc_lines))
-    print(f"✅ Done! VLC-compatible playlist saved as PPVLand_vlc.m3u8 at {datetime.utcnow().isoformat()} UTC")
-
-if __name__ == "__main__":
-    asyncio.run(main())
+        http_client.run(main())
+    finally:
+        validation_cache.close_cache()
+        host_scheduler.get_scheduler().report()
+        ROUTES.report()
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from urllib.parse import unquote, urlsplit
+
+import aiohttp
+
+from http_client import make_session
+from m3u_parser import parse_file
+import validation_cache
+
+HEALTH_FILE = os.path.join(".cache", "health.json")
+TOTAL_CONNECTIONS = 256
+PER_HOST_CONCURRENCY = 8
+REQUESTS_PER_SECOND = 100
+PROBE_TIMEOUT = aiohttp.ClientTimeout(total=10, sock_connect=5)
+PROBE_BYTES = 512
+# A stream is only considered dead after failing this many runs in a row
+DEAD_AFTER = 3
+
+VLCOPT_HEADERS = {
+    "http-user-agent": "User-Agent",
+    "http-referrer": "Referer",
+    "http-origin": "Origin",
+}
+PIPE_HEADERS = {"user-agent": "User-Agent", "referer": "Referer", "referrer": "Referer", "origin": "Origin"}
+
+def request_for(entry):
+    """Split an entry into (url, headers), replaying #EXTVLCOPT options and |Key=Value pipe params."""
+    url, _, pipe = entry.url.partition("|")
+    headers = {VLCOPT_HEADERS[k]: v for k, v in entry.vlcopts.items() if k in VLCOPT_HEADERS}
+    for param in pipe.split("&"):
+        key, sep, value = param.partition("=")
+        if sep and key.strip().lower() in PIPE_HEADERS:
+            headers[PIPE_HEADERS[key.strip().lower()]] = unquote(value)
+    return url, headers
+
+class RateLimiter:
+    """Spaces request starts at most 1/rate seconds apart across all hosts."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def probe_url(session, url, headers):
+    """GET the first few bytes of a stream; returns (status, elapsed_ms, error)."""
+    start = time.perf_counter()
+    try:
+        async with session.get(url, headers=headers, allow_redirects=True) as resp:
+            await resp.content.read(PROBE_BYTES)
+            status, error = resp.status, None
+    except asyncio.TimeoutError:
+        status, error = None, "timeout"
+    except aiohttp.ClientError as e:
+        status, error = None, type(e).__name__
+    except ValueError as e:
+        status, error = None, f"bad url: {e}"
+    return status, round((time.perf_counter() - start) * 1000), error
+
+class Prober:
+    """
+    Checks stream URLs concurrently: one shared session, a semaphore per
+    host and a global request rate. Results are merged into a persistent
+    health file so dead-ness is judged over consecutive runs.
+    """
+
+    def __init__(self, per_host=PER_HOST_CONCURRENCY, rate=REQUESTS_PER_SECOND,
+                 health_file=HEALTH_FILE, dead_after=DEAD_AFTER, cache=None):
+        self.per_host = per_host
+        self.cache = cache
+        self.limiter = RateLimiter(rate)
+        self.health_file = health_file
+        self.dead_after = dead_after
+        self.host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        try:
+            with open(health_file, "r", encoding="utf-8") as f:
+                self.health = json.load(f).get("urls", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.health = {}
+
+    async def _probe_one(self, session, key, url, headers):
+        host = urlsplit(url).netloc
+        async with self.host_slots[host]:
+            await self.limiter.wait()
+            return key, await probe_url(session, url, headers)
+
+    async def probe(self, entries):
+        """
+        Probe every distinct entry URL once and return {entry.url: record}.
+        URLs with a fresh outcome in the validation cache keep their last
+        health record instead of being probed again.
+        """
+        pending = {}
+        results = {}
+        for entry in entries:
+            url = entry.url
+            if url in pending or url in results or not url.startswith(("http://", "https://")):
+                continue
+            fresh = self.cache is not None and self.cache.get(url, namespace=validation_cache.PROBE) is not None
+            if fresh and url in self.health:
+                results[url] = self.health[url]
+                continue
+            pending[url] = request_for(entry)
+
+        print(f"🩺 Probing {len(pending)} stream URLs, {len(results)} fresh in cache "
+              f"({self.per_host}/host, {self.limiter.interval and 1 / self.limiter.interval:.0f} req/s)")
+        started = time.perf_counter()
+        async with make_session(limit=TOTAL_CONNECTIONS, per_host=0, timeout=PROBE_TIMEOUT) as session:
+            tasks = [self._probe_one(session, key, url, headers) for key, (url, headers) in pending.items()]
+            for task in asyncio.as_completed(tasks):
+                key, (status, ms, error) = await task
+                ok = status is not None and status < 400
+                previous = self.health.get(key, {})
+                results[key] = self.health[key] = {
+                    "status": status,
+                    "ok": ok,
+                    "ms": ms,
+                    "error": error,
+                    "fail_streak": 0 if ok else previous.get("fail_streak", 0) + 1,
+                    "checked": int(time.time()),
+                }
+                if self.cache is not None:
+                    transient = status is None or status == 429 or status >= 500
+                    self.cache.put(key, "live" if ok else "dead", status,
+                                   namespace=validation_cache.PROBE, transient=transient)
+        self.elapsed = time.perf_counter() - started
+        return results
+
+    def is_dead(self, url):
+        record = self.health.get(url)
+        return bool(record) and record["fail_streak"] >= self.dead_after
+
+    def save(self, urls=None):
+        """Write the health file, keeping only the given URLs when provided."""
+        if urls is not None:
+            self.health = {u: r for u, r in self.health.items() if u in urls}
+        hosts = defaultdict(Counter)
+        for url, record in self.health.items():
+            host = urlsplit(url.partition("|")[0]).netloc
+            hosts[host]["alive" if record["ok"] else "failing"] += 1
+            if self.is_dead(url):
+                hosts[host]["dead"] += 1
+        report = {
+            "generated": int(time.time()),
+            "dead_after": self.dead_after,
+            "hosts": {h: dict(c) for h, c in sorted(hosts.items())},
+            "urls": self.health,
+        }
+        os.makedirs(os.path.dirname(self.health_file) or ".", exist_ok=True)
+        tmp_path = self.health_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        os.replace(tmp_path, self.health_file)
+
+    def report(self, results, top=10):
+        failing = [u for u, r in results.items() if not r["ok"]]
+        dead = [u for u in failing if self.is_dead(u)]
+        print(f"🩺 Probed {len(results)} URLs in {self.elapsed:.1f}s: "
+              f"{len(results) - len(failing)} alive, {len(failing)} failing, {len(dead)} dead "
+              f"(failed {self.dead_after}+ runs in a row)")
+        by_host = Counter(urlsplit(u.partition("|")[0]).netloc for u in failing)
+        for host, count in by_host.most_common(top):
+            print(f"   • {host}: {count} failing")
+
+def drop_dead_entries(runs, prober):
+    """Remove entries the prober considers dead from pre-sorted runs."""
+    kept_runs = []
+    dropped = 0
+    for run in runs:
+        kept = [e for e in run if not prober.is_dead(e.url)]
+        dropped += len(run) - len(kept)
+        kept_runs.append(kept)
+    print(f"🪦 Dropped {dropped} dead entries")
+    return kept_runs
+
+async def main(path="MergedCleanPlaylist.m3u8"):
+    entries = parse_file(path)
+    prober = Prober(cache=validation_cache.get_cache())
+    results = await prober.probe(entries)
+    prober.save()
+    prober.report(results)
+    validation_cache.close_cache()
+
+if __name__ == "__main__":
+    asyncio.run(main(*sys.argv[1:2]))
@@ -0,0 +1,196 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+
+from upstream import UPSTREAM_ENV, original_url
+
+REPLAY_DIR = os.path.join(".cache", "replay")
+INDEX_FILE = "index.json"
+DEFAULT_PORT = 8765
+
+class ReplayStore:
+    """Recorded upstream responses keyed by their original URL."""
+
+    def __init__(self, replay_dir=REPLAY_DIR):
+        self.dir = replay_dir
+        self.index_path = os.path.join(replay_dir, INDEX_FILE)
+        self.lock = threading.Lock()
+        os.makedirs(replay_dir, exist_ok=True)
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+
+    def _path(self, url):
+        return os.path.join(self.dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".body")
+
+    def get(self, url):
+        """Return (status, content_type, body) for a recorded URL, else None."""
+        meta = self.index.get(url)
+        if not meta:
+            return None
+        try:
+            with open(self._path(url), "rb") as f:
+                return meta["status"], meta["content_type"], f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, url, status, content_type, body):
+        with self.lock:
+            with open(self._path(url), "wb") as f:
+                f.write(body)
+            self.index[url] = {"status": status, "content_type": content_type, "size": len(body)}
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=2)
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """
+    Serves GET /{scheme}/{host}/{path} (the form upstream_url produces) from
+    the store, after the configured latency and failure injection. Misses
+    fall back to a same-named file in --tree, then to the live upstream in
+    record mode, then 404.
+    """
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _delay(self):
+        s = self.server
+        delay = s.latency + s.rng.uniform(-s.jitter, s.jitter) if s.jitter else s.latency
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _lookup(self, url):
+        s = self.server
+        found = s.store.get(url)
+        if found:
+            return found, "replayed"
+        if s.tree:
+            path = os.path.join(s.tree, os.path.basename(urlsplit(url).path))
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    return (200, "text/plain; charset=utf-8", f.read()), "tree"
+        if s.record:
+            try:
+                res = requests.get(url, timeout=30, headers={"User-Agent": self.headers.get("User-Agent", "")})
+            except requests.RequestException as e:
+                print(f"❌ Record failed for {url}: {e}")
+                return None, "missing"
+            found = (res.status_code, res.headers.get("Content-Type", "application/octet-stream"), res.content)
+            s.store.put(url, *found)
+            return found, "recorded"
+        return None, "missing"
+
+    def _serve(self, send_body):
+        s = self.server
+        url = original_url(self.path)
+        self._delay()
+
+        if s.rng.random() < s.fail_rate:
+            s.count("failed")
+            self.send_error(s.fail_status, "Injected failure")
+            return
+
+        found, how = self._lookup(url)
+        s.count(how)
+        if found is None:
+            print(f"⚠️ No recording for {url}")
+            self.send_error(404, "Not recorded")
+            return
+
+        status, content_type, body = found
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store, latency=0, jitter=0, fail_rate=0.0, fail_status=503,
+                 seed=None, tree=None, record=False, verbose=False):
+        super().__init__(address, ReplayHandler)
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.rng = random.Random(seed)
+        self.tree = tree
+        self.record = record
+        self.verbose = verbose
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key):
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def report(self):
+        summary = ", ".join(f"{n} {k}" for k, n in sorted(self.stats.items())) or "no requests"
+        print(f"📼 Replay: {summary}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded upstream responses for offline runs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--dir", default=REPLAY_DIR, help="recording directory")
+    parser.add_argument("--tree", help="serve misses from same-named files in this directory (e.g. the repo)")
+    parser.add_argument("--record", action="store_true", help="fetch and store misses from the real upstream")
+    parser.add_argument("--latency", type=float, default=0, help="added delay per request, ms")
+    parser.add_argument("--jitter", type=float, default=0, help="uniform +/- jitter on the delay, ms")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with --fail-status")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, help="seed for jitter and failures, for repeatable runs")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        (args.host, args.port), ReplayStore(args.dir),
+        latency=args.latency, jitter=args.jitter, fail_rate=args.fail_rate, fail_status=args.fail_status,
+        seed=args.seed, tree=args.tree, record=args.record, verbose=args.verbose,
+    )
+    print(f"📼 Replay server on {server.base_url} ({len(server.store.index)} recordings"
+          f"{', recording misses' if args.record else ''})")
+    print(f"   export {UPSTREAM_ENV}={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.report()
+
+if __name__ == "__main__":
+    main()
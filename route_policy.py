@@ -0,0 +1,120 @@
+import asyncio
+import re
+import weakref
+from collections import Counter
+from urllib.parse import urlsplit
+
+from m3u8_capture import manifest_url
+
+# Resource types a manifest hunt never needs
+BLOCKED_TYPES = {"image", "font", "texttrack"}
+# Blocked only once the page has requested a manifest: some players probe
+# with a media request or a segment before asking for the playlist
+AFTER_MANIFEST_TYPES = {"media"}
+# Ad, popup and analytics networks the embed players pull in
+AD_HOSTS = {
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "googletagservices.com", "adservice.google.com", "amazon-adsystem.com",
+    "adnxs.com", "taboola.com", "outbrain.com", "popads.net", "popcash.net", "propellerads.com",
+    "exoclick.com", "juicyads.com", "adsterra.com", "histats.com", "scorecardresearch.com",
+    "hotjar.com", "facebook.net", "quantserve.com", "cloudflareinsights.com",
+}
+# Media segments, blocked under the same condition as AFTER_MANIFEST_TYPES
+SEGMENT_RE = re.compile(r"\.(ts|m4s|aac|m4a|m4v|mp4|vtt)$", re.IGNORECASE)
+
+def _matches(host, domains):
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+def _page_of(request):
+    try:
+        return request.frame.page
+    except Exception:
+        # Service worker requests have no frame
+        return None
+
+class RoutePolicy:
+    """
+    Aborts requests a scraper does not need (heavy resource types, ad and
+    tracker hosts, and, once a page has requested its manifest, media and
+    segments) on every context it is applied to, and tallies what was
+    blocked and how many bytes were still transferred. A main-frame
+    navigation starts the page's manifest watch over. allow_types and
+    allow_hosts exempt what a particular site relies on.
+    """
+
+    def __init__(self, name, allow_types=(), allow_hosts=()):
+        self.name = name
+        self.blocked_types = BLOCKED_TYPES - set(allow_types)
+        self.after_manifest_types = AFTER_MANIFEST_TYPES - set(allow_types)
+        self.allow_hosts = set(allow_hosts)
+        self.blocked = Counter()
+        self.requests = 0
+        self.bytes = 0
+        self._pending = set()
+        self._manifest_pages = weakref.WeakSet()
+
+    def block_reason(self, url, resource_type, manifest_seen=False):
+        """Why a request should be aborted, or None to let it through."""
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        if _matches(host, self.allow_hosts):
+            return None
+        if resource_type in self.blocked_types:
+            return resource_type
+        if _matches(host, AD_HOSTS):
+            return "ad/tracker"
+        if not manifest_seen:
+            return None
+        if resource_type in self.after_manifest_types:
+            return resource_type
+        if SEGMENT_RE.search(parts.path):
+            return "segment"
+        return None
+
+    def _manifest_seen(self, request):
+        page = _page_of(request)
+        if page is None:
+            return False
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            self._manifest_pages.discard(page)
+        elif manifest_url(request.url):
+            self._manifest_pages.add(page)
+        return page in self._manifest_pages
+
+    async def _route(self, route):
+        request = route.request
+        reason = self.block_reason(request.url, request.resource_type, self._manifest_seen(request))
+        if reason:
+            self.blocked[reason] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _measure(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self.requests += 1
+        self.bytes += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+
+    def _on_finished(self, request):
+        task = asyncio.ensure_future(self._measure(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def apply(self, context):
+        """Install the policy on a browser context; returns the context."""
+        await context.route("**/*", self._route)
+        context.on("requestfinished", self._on_finished)
+        return context
+
+    async def drain(self):
+        """Wait for in-flight size measurements; call before closing the browser."""
+        if self._pending:
+            await asyncio.gather(*self._pending)
+
+    def report(self):
+        blocked = ", ".join(f"{count} {reason}" for reason, count in self.blocked.most_common())
+        print(f"🧹 {self.name}: {self.requests} requests, {self.bytes / 1e6:.1f} MB transferred, "
+              f"{sum(self.blocked.values())} blocked" + (f" ({blocked})" if blocked else ""))
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+
+from m3u_parser import Entry
+
+SNAPSHOT_DIR = os.path.join(".cache", "snapshots")
+
+class SnapshotStore:
+    """
+    Per-source snapshots of parsed, filtered and pre-sorted channel runs.
+
+    A snapshot is keyed by the hash of the source's content (plus a salt
+    describing the pipeline that produced it), so an unchanged source is
+    loaded back as ready-to-merge runs without parsing or filtering.
+    """
+
+    def __init__(self, name, salt=""):
+        self.dir = os.path.join(SNAPSHOT_DIR, name)
+        self.salt = salt
+        self.reused = 0
+        self.rebuilt = 0
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def content_hash(self, lines):
+        h = hashlib.sha256(self.salt.encode("utf-8"))
+        for line in lines:
+            h.update(line.encode("utf-8"))
+            h.update(b"\n")
+        return h.hexdigest()
+
+    def load(self, url, content_hash):
+        """Return {run_name: [Entry, ...]} if the stored snapshot matches, else None."""
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("hash") != content_hash:
+                return None
+            runs = {name: [Entry.from_record(r) for r in records] for name, records in data["runs"].items()}
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+            return None
+        self.reused += 1
+        return runs
+
+    def save(self, url, content_hash, runs):
+        self.rebuilt += 1
+        data = {
+            "url": url,
+            "hash": content_hash,
+            "runs": {name: [e.to_record() for e in entries] for name, entries in runs.items()},
+        }
+        tmp_path = self._path(url) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._path(url))
+
+    def prune(self, urls):
+        """Delete snapshots for sources that are no longer configured."""
+        keep = {os.path.basename(self._path(u)) for u in urls}
+        for name in os.listdir(self.dir):
+            if name.endswith(".json") and name not in keep:
+                os.remove(os.path.join(self.dir, name))
+
+    def report(self):
+        print(f"🧊 Snapshots: {self.reused} reused, {self.rebuilt} rebuilt")
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import time
+
+CACHE_DIR = os.path.join(".cache", "sources")
+INDEX_FILE = "index.json"
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+class SourceCache:
+    """
+    On-disk cache of upstream playlist bodies keyed by URL.
+
+    Each entry keeps the ETag / Last-Modified validators from the last 200
+    response so the next run can send a conditional GET; a 304 is then
+    answered from the stored body.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_fetched = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+
+    def _path(self, url, suffix):
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, name + suffix)
+
+    def conditional_headers(self, url):
+        meta = self.index.get(url)
+        if not meta or not os.path.exists(self._path(url, ".body")):
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def load_body(self, url):
+        """Return the cached body for a 304 and count it as a hit."""
+        with open(self._path(url, ".body"), "rb") as f:
+            body = f.read()
+        self.hits += 1
+        self.bytes_saved += len(body)
+        self.index[url]["last_used"] = time.time()
+        return body
+
+    def store_body(self, url, body, etag=None, last_modified=None):
+        self.misses += 1
+        self.bytes_fetched += len(body)
+        with open(self._path(url, ".body"), "wb") as f:
+            f.write(body)
+        self.index[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": len(body),
+            "last_used": time.time(),
+        }
+
+    def _entry_bytes(self, url):
+        path = self._path(url, ".body")
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        sizes = {url: self._entry_bytes(url) for url in self.index}
+        total = sum(sizes.values())
+        evicted = 0
+        for url in sorted(self.index, key=lambda u: self.index[u].get("last_used", 0)):
+            if total <= self.max_bytes:
+                break
+            path = self._path(url, ".body")
+            if os.path.exists(path):
+                os.remove(path)
+            total -= sizes[url]
+            del self.index[url]
+            evicted += 1
+        return evicted
+
+    def save(self):
+        evicted = self.evict()
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2)
+        return evicted
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0
+        print(f"📦 Source cache: {self.hits}/{total} hits ({rate:.0f}%), "
+              f"{self.bytes_saved / 1024:.1f} KB saved, {self.bytes_fetched / 1024:.1f} KB downloaded")
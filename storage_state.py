@@ -0,0 +1,59 @@
+import json
+import os
+import time
+
+STATE_DIR = os.path.join(".cache", "storage_state")
+# Cookies that carry a passed challenge; the saved state is only worth as much as these
+CLEARANCE_COOKIES = {"cf_clearance"}
+# Lifetime of state without a clearance cookie, or whose clearance cookie has no expiry
+DEFAULT_TTL = 6 * 3600
+
+def _expiry(state, saved):
+    clearance = [c["expires"] for c in state.get("cookies", [])
+                 if c.get("name") in CLEARANCE_COOKIES and c.get("expires", -1) > 0]
+    return min(clearance) if clearance else saved + DEFAULT_TTL
+
+class StorageState:
+    """
+    A site's Playwright storage state (cookies, localStorage, challenge
+    clearance) kept in STATE_DIR between runs, so a new context starts
+    where the last run's left off. Saved state expires with its earliest
+    clearance cookie, or DEFAULT_TTL after saving when it has none.
+    """
+
+    def __init__(self, site, state_dir=STATE_DIR):
+        self.site = site
+        self.path = os.path.join(state_dir, f"{site}.json")
+
+    def load(self):
+        """The saved storage state, minus expired cookies; None if missing or expired."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        now = time.time()
+        left = record.get("expires", 0) - now
+        if left <= 0:
+            print(f"🍪 {self.site}: saved browser state expired, starting fresh")
+            return None
+        state = record["state"]
+        state["cookies"] = [c for c in state.get("cookies", []) if not 0 < c.get("expires", -1) <= now]
+        print(f"🍪 {self.site}: reusing browser state ({len(state['cookies'])} cookies, "
+              f"expires in {left / 3600:.1f}h)")
+        return state
+
+    def context_options(self):
+        """new_context() keyword arguments that restore the saved state, if any."""
+        state = self.load()
+        return {"storage_state": state} if state else {}
+
+    async def save(self, context):
+        state = await context.storage_state()
+        saved = time.time()
+        record = {"saved": saved, "expires": _expiry(state, saved), "state": state}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, self.path)
@@ -1,10 +1,24 @@
 import asyncio
 import json
 from datetime import datetime
-from playwright.async_api import async_playwright, Request
+from playwright.async_api import async_playwright
+
+import browser_service
+import host_scheduler
+from m3u8_capture import ManifestCapture
+from route_policy import RoutePolicy
+from storage_state import StorageState
 
 BASE_URL = "https://www.streameast.xyz"
 M3U8_FILE = "StreamEast.m3u8"
+ROUTES = RoutePolicy("StreamEast")
+STATE = StorageState("StreamEast")
+# One test for spotting, waiting out and rechecking an interstitial; a bare
+# "cloudflare" in the HTML also matches pages that merely load its scripts
+CHALLENGE_TEST = ("/just a moment|attention required/i.test(document.title) || "
+                  "!!document.querySelector('#challenge-form, #challenge-running, #cf-challenge-running')")
+# How long to let an interstitial solve itself before counting the load as failed
+CHALLENGE_WAIT = 15000
 
 CATEGORY_LOGOS = {
     "StreamEast - PPV Events": "http://drewlive24.duckdns.org:9000/Logos/PPV.png",
@@ -53,19 +67,41 @@ def categorize_stream(url, title=""):
     return "StreamEast - PPV Events"
 
 
+class ChallengePage(Exception):
+    pass
+
+
+async def is_challenge(page):
+    return await page.evaluate(f"() => {CHALLENGE_TEST}")
+
+
 async def safe_goto(page, url, tries=2, timeout=20000):
-    for attempt in range(tries):
+    challenged = False
+
+    async def load():
+        nonlocal challenged
+        await page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+        if not await is_challenge(page):
+            return
+        challenged = True
         try:
-            await page.goto(url, timeout=timeout, wait_until="domcontentloaded")
-            html = await page.content()
-            if any(x in html.lower() for x in ["cloudflare", "just a moment", "attention required"]):
-                await asyncio.sleep(2)
-                continue
-            return True
-        except Exception as e:
-            print(f"⚠️ Error loading {url}: {e}")
-            await asyncio.sleep(2)
-    return False
+            await page.wait_for_function(f"() => !({CHALLENGE_TEST})", timeout=CHALLENGE_WAIT)
+            await page.wait_for_load_state("domcontentloaded")
+        except Exception:
+            pass
+        if await is_challenge(page):
+            raise ChallengePage("challenge page")
+
+    try:
+        await host_scheduler.get_scheduler().run(url, load, retries=tries - 1)
+    except Exception as e:
+        print(f"⚠️ Error loading {url}: {e}")
+        return False
+    if challenged:
+        # Keep the clearance so the next run (and the next context) skips the interstitial
+        print("🔓 Challenge passed, saving browser state")
+        await STATE.save(page.context)
+    return True
 
 
 async def get_event_links(page):
@@ -81,50 +117,41 @@ async def get_event_links(page):
 
 
 async def scrape_stream_url(context, url):
-    m3u8_links = set()
+    m3u8_links = []
     event_name = "Unknown Event"
     page = await context.new_page()
 
-    def capture_request(request: Request):
-        if ".m3u8" in request.url.lower() and not m3u8_links:
-            print(f"🎯 Found stream: {request.url}")
-            m3u8_links.add(request.url)
-
-    page.on("request", capture_request)
-
     try:
-        if not await safe_goto(page, url): return event_name, []
-        await asyncio.sleep(1)
-
-        event_name = await page.evaluate("""
-            () => {
-                const selectors = ['h1', '.event-title', '.title', '.stream-title'];
-                for (let sel of selectors) {
-                    const el = document.querySelector(sel);
-                    if (el) return el.textContent.trim();
+        async with ManifestCapture(page) as capture:
+            if not await safe_goto(page, url): return event_name, []
+
+            event_name = await page.evaluate("""
+                () => {
+                    const selectors = ['h1', '.event-title', '.title', '.stream-title'];
+                    for (let sel of selectors) {
+                        const el = document.querySelector(sel);
+                        if (el) return el.textContent.trim();
+                    }
+                    return document.title.trim();
                 }
-                return document.title.trim();
-            }
-        """)
+            """)
 
-        await page.mouse.click(500, 500)
-        for _ in range(10):
-            if m3u8_links:
-                break
-            await asyncio.sleep(0.5)
+            m3u8_links = await capture.escalate(patience=1, deadline=10)
 
     except Exception as e:
         print(f"⚠️ Error scraping {url}: {e}")
     finally:
         await page.close()
 
-    return event_name, list(m3u8_links)
+    return event_name, m3u8_links
 
 
 async def main():
     async with async_playwright() as p:
-        browser = await p.firefox.launch(headless=True)
-        context = await browser.new_context(user_agent="Mozilla/5.0 Firefox/139.0")
+        browser = await browser_service.launch(p, headless=True)
+        context = await ROUTES.apply(await browser.new_context(
+            user_agent="Mozilla/5.0 Firefox/139.0", **STATE.context_options()
+        ))
 
         main_page = await context.new_page()
         links = await get_event_links(main_page)
@@ -147,10 +174,15 @@ async def main():
                     f.write('#EXTVLCOPT:http-origin=https://streamscenter.online\n')
                     f.write('#EXTVLCOPT:http-referrer=https://streamscenter.online/\n')
                     f.write(f'{s_url}\n\n')
-                await asyncio.sleep(0.5)
 
         print("✅ StreamEast.m3u8 saved.")
+        await STATE.save(context)
+        await ROUTES.drain()
         await browser.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        host_scheduler.get_scheduler().report()
+        ROUTES.report()
@@ -0,0 +1,168 @@
+import base64
+import binascii
+import json
+import os
+import re
+import time
+from collections import Counter
+from html import unescape
+from urllib.parse import urljoin, urlsplit
+
+import host_scheduler
+import http_client
+
+TIER_FILE = os.path.join(".cache", "extractor_tiers.json")
+HTTP = "http"
+BROWSER = "browser"
+# A host pinned to the browser tier gets another HTTP attempt after this long
+RECHECK_AFTER = 24 * 3600
+MAX_HTML_BYTES = 512 * 1024
+# Embed page plus up to this many nested iframes
+IFRAME_DEPTH = 2
+
+# Absolute manifest URLs, including JSON-escaped ones (https:\/\/host\/a.m3u8)
+ABSOLUTE_RE = re.compile(r"""https?:(?:\\?/){2}[^\s"'<>()]+?\.m3u8[^\s"'<>()\\]*""", re.IGNORECASE)
+# Relative manifests handed to a player: file: "...", source = '...', src="..."
+SOURCE_RE = re.compile(r"""\b(?:file|source|src|hls)\s*[:=]\s*["']([^"'\s]+?\.m3u8[^"'\s]*)["']""", re.IGNORECASE)
+ATOB_RE = re.compile(r"""atob\(\s*["']([A-Za-z0-9+/=]{16,})["']\s*\)""")
+IFRAME_RE = re.compile(r"""<iframe\b[^>]*?\bsrc\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+
+def absolute_urls(html, base_url):
+    return [m.replace("\\/", "/") for m in ABSOLUTE_RE.findall(html)]
+
+def player_sources(html, base_url):
+    return [urljoin(base_url, m.replace("\\/", "/")) for m in SOURCE_RE.findall(html)]
+
+def atob_payloads(html, base_url):
+    """Manifest URLs hidden in base64 strings passed to atob()."""
+    urls = []
+    for payload in ATOB_RE.findall(html):
+        try:
+            decoded = base64.b64decode(payload).decode("utf-8", errors="ignore")
+        except (binascii.Error, ValueError):
+            continue
+        urls.extend(absolute_urls(decoded, base_url))
+    return urls
+
+DEFAULT_RULES = (absolute_urls, player_sources, atob_payloads)
+# Host suffix -> rules tried (in order) instead of DEFAULT_RULES for pages on that host
+SITE_RULES = {}
+
+def rules_for(url, site_rules=SITE_RULES):
+    host = urlsplit(url).hostname or ""
+    for domain, rules in site_rules.items():
+        if host == domain or host.endswith("." + domain):
+            return rules
+    return DEFAULT_RULES
+
+def extract_manifests(html, base_url, rules=DEFAULT_RULES):
+    """Manifest URLs found in a page's HTML and inline JS, first seen first, without duplicates."""
+    html = unescape(html)
+    found = []
+    for rule in rules:
+        for url in rule(html, base_url):
+            if url not in found:
+                found.append(url)
+    return found
+
+class TieredExtractor:
+    """
+    Finds a stream's manifest the cheapest way that works for its host:
+    plain HTTP fetches of the embed page and its iframes first, the
+    browser only on a miss. The tier that last succeeded per host is kept
+    in TIER_FILE, so hosts that need a browser skip the HTTP attempt until
+    it is due for a recheck.
+    """
+
+    def __init__(self, path=TIER_FILE, headers=None, site_rules=SITE_RULES):
+        self.path = path
+        self.headers = dict(headers or {})
+        self.site_rules = site_rules
+        self.wins = Counter()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.tiers = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.tiers = {}
+
+    def wants_http(self, host):
+        record = self.tiers.get(host)
+        if not record or record["tier"] == HTTP:
+            return True
+        return time.time() - record["checked"] >= RECHECK_AFTER
+
+    def record(self, host, tier):
+        self.tiers[host] = {"tier": tier, "checked": time.time()}
+
+    async def _fetch(self, url, referer=None):
+        headers = {**self.headers, "Referer": referer} if referer else self.headers
+
+        async def fetch():
+            async with http_client.get_session().get(url, headers=headers) as resp:
+                body = await resp.content.read(MAX_HTML_BYTES)
+                return resp.status, body.decode("utf-8", errors="ignore")
+
+        try:
+            status, html = await host_scheduler.get_scheduler().run(url, fetch, retries=0)
+        except Exception as e:
+            print(f"[!] HTTP fetch failed for {url}: {e}")
+            return None
+        return html if status < 400 else None
+
+    async def from_http(self, url):
+        """Manifest URLs in the embed page's HTML, then in its iframes', breadth first."""
+        found = []
+        pending = [(url, None, 0)]
+        seen = set()
+        while pending:
+            page_url, referer, depth = pending.pop(0)
+            if page_url in seen:
+                continue
+            seen.add(page_url)
+            html = await self._fetch(page_url, referer)
+            if html is None:
+                continue
+            for manifest in extract_manifests(html, page_url, rules_for(page_url, self.site_rules)):
+                if manifest not in found:
+                    found.append(manifest)
+            if depth < IFRAME_DEPTH:
+                pending.extend((urljoin(page_url, unescape(src)), page_url, depth + 1)
+                               for src in IFRAME_RE.findall(html) if not src.startswith(("about:", "javascript:")))
+        return found
+
+    async def extract(self, url, browser_capture, check):
+        """
+        First manifest for url that check() accepts, trying HTTP before
+        awaiting browser_capture(url) for the browser's candidates. Returns
+        None when neither tier finds a playable manifest.
+        """
+        host = urlsplit(url).hostname or url
+        tried_http = self.wants_http(host)
+        if tried_http:
+            for manifest in await self.from_http(url):
+                if await check(manifest):
+                    print(f"[⚡] Found over HTTP: {manifest}")
+                    self.record(host, HTTP)
+                    self.wins[HTTP] += 1
+                    return manifest
+        for manifest in await browser_capture(url):
+            if await check(manifest):
+                # A skipped HTTP tier keeps its old timestamp so the recheck still comes due
+                if tried_http:
+                    self.record(host, BROWSER)
+                self.wins[BROWSER] += 1
+                return manifest
+        self.wins["missed"] += 1
+        return None
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.tiers, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def report(self):
+        by_tier = Counter(record["tier"] for record in self.tiers.values())
+        print(f"🪜 Extractor: {self.wins[HTTP]} via HTTP, {self.wins[BROWSER]} via browser, "
+              f"{self.wins['missed']} missed; hosts on HTTP {by_tier[HTTP]}, on browser {by_tier[BROWSER]}")
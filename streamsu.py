@@ -1,21 +1,35 @@
-import asyncio
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from datetime import datetime
-import aiohttp
 import os
 
+import browser_service
+import hls_validator
+import host_scheduler
+import http_client
+import m3u8_capture
+import validation_cache
+from route_policy import RoutePolicy
+from storage_state import StorageState
+from stream_extractor import TieredExtractor
+from upstream import upstream_url
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/122.0.0.0 Safari/537.36"
+ROUTES = RoutePolicy("StreamedSU")
+STATE = StorageState("StreamedSU")
+EXTRACTOR = TieredExtractor(headers={"User-Agent": USER_AGENT})
+
 def fix_url(url):
-    return url.replace("streamed.su", "streamed.pk")
-
-async def safe_request_with_retry(request, url, retries=3, delay=5, headers=None):
-    for attempt in range(retries):
-        try:
-            resp = await request.get(url, timeout=60000, headers=headers)
-            return await resp.json()
-        except Exception as e:
-            print(f"[!] Error fetching {url} (attempt {attempt + 1}/{retries}): {e}")
-            if attempt < retries - 1:
-                await asyncio.sleep(delay)
+    return upstream_url(url.replace("streamed.su", "streamed.pk"))
+
+async def safe_request_with_retry(request, url, retries=3, headers=None):
+    async def fetch():
+        resp = await request.get(url, timeout=60000, headers=headers)
+        return await resp.json()
+
+    try:
+        return await host_scheduler.get_scheduler().run(url, fetch, retries=retries - 1)
+    except Exception as e:
+        print(f"[!] Error fetching {url} after {retries} attempts: {e}")
     return []
 
 ALLOWED_CATEGORIES = {
@@ -51,11 +65,27 @@ ALLOWED_CATEGORIES = {
 
 async def check_m3u8_url(url):
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=7) as resp:
-                return resp.status == 200
-    except Exception:
+        result = await host_scheduler.get_scheduler().run(
+            url,
+            lambda: hls_validator.validate(url, cache=validation_cache.get_cache()),
+            retries=0,
+            failed=lambda r: r.host_failed,
+        )
+    except host_scheduler.CircuitOpenError as e:
+        print(f"[!] Skipping {url}: {e}")
         return False
+    print(f"[🧪] {result}")
+    return result.ok
+
+async def capture_in_browser(page, embed_url):
+    # Players that stay silent get their iframe opened top-level, then clicked
+    return await m3u8_capture.capture(
+        page,
+        embed_url,
+        steps=(m3u8_capture.open_first_iframe, *m3u8_capture.ESCALATION),
+        patience=2,
+        goto_timeout=15000,
+    )
 
 async def main():
     m3u_path = "StreamedSU.m3u8"
@@ -63,29 +93,17 @@ async def main():
         os.remove(m3u_path)
 
     async with async_playwright() as p:
-        browser = await p.firefox.launch(headless=True)
-        context = await browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/122.0.0.0 Safari/537.36")
+        browser = await browser_service.launch(p, headless=True)
+        context = await ROUTES.apply(await browser.new_context(user_agent=USER_AGENT, **STATE.context_options()))
         page = await context.new_page()
         request = context.request
 
         m3u = ["#EXTM3U"]
 
-        # Shared capture variable
-        m3u8_url = None
-
-        # Capture all .m3u8 from any frame/page
-        def capture_request(req):
-            nonlocal m3u8_url
-            if ".m3u8" in req.url and not m3u8_url:
-                m3u8_url = req.url
-                print(f"[🎯] Captured M3U8: {m3u8_url}")
-
-        context.on("request", capture_request)
-
         headers = {
             "Accept": "*/*",
             "Accept-Encoding": "gzip, deflate, br",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/122.0.0.0 Safari/537.36"
+            "User-Agent": USER_AGENT
         }
 
         sports = await safe_request_with_retry(request, fix_url("https://streamed.su/api/sports"), headers=headers)
@@ -144,34 +162,14 @@ async def main():
 
                         try:
                             print(f"\nVisiting: {title} (source: {source_type})")
-                            await page.goto(embed_url, timeout=15000)
-                            await page.wait_for_timeout(2000)
-
-                            # Check for iframe
-                            iframe_el = await page.query_selector("iframe")
-                            if iframe_el:
-                                iframe_src = await iframe_el.get_attribute("src")
-                                if iframe_src:
-                                    print(f"[🔍] Found iframe: {iframe_src}")
-                                    await page.goto(iframe_src, timeout=15000)
-                                    await page.wait_for_timeout(4000)
-
-                            # Click to trigger playback
-                            for _ in range(6):
-                                await page.mouse.click(400, 300)
-                                await page.wait_for_timeout(2000)
-                                if m3u8_url:
-                                    break
-
+                            m3u8_url = await EXTRACTOR.extract(
+                                embed_url,
+                                lambda url: capture_in_browser(page, url),
+                                check_m3u8_url,
+                            )
                             if m3u8_url:
-                                valid = await check_m3u8_url(m3u8_url)
-                                if valid:
-                                    break
-                                else:
-                                    print(f"[!] Invalid stream URL (not 200): {m3u8_url}")
-                                    m3u8_url = None
-                            else:
-                                print(f"[✖] No m3u8 found for: {embed_url}")
+                                break
+                            print(f"[✖] No playable m3u8 found for: {embed_url}")
 
                         except PlaywrightTimeoutError:
                             print(f"[!] Timeout while loading: {embed_url}")
@@ -202,10 +200,18 @@ async def main():
             f.write(playlist)
 
         print("\n✅ Done. Playlist written to StreamedSU.m3u8")
+        await STATE.save(context)
+        await ROUTES.drain()
         await browser.close()
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        http_client.run(main())
     except Exception as e:
         print(f"[!] Fatal error in main: {e}")
+    finally:
+        validation_cache.close_cache()
+        EXTRACTOR.save()
+        EXTRACTOR.report()
+        host_scheduler.get_scheduler().report()
+        ROUTES.report()
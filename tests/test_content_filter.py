@@ -0,0 +1,34 @@
+from content_filter import ContentFilter, load_rules, rule_counts
+from m3u_parser import Entry
+
+def test_match_is_case_insensitive_across_fields():
+    f = ContentFilter(["xxx", "adult"])
+    assert f.match_fields('#EXTINF:-1,XXX Channel', (), "http://h/1") == "xxx"
+    assert f.match_fields('#EXTINF:-1,Fine', ("#EXTVLCOPT:http-referrer=https://Adult.site/",), "http://h/1") == "adult"
+    assert f.match_fields('#EXTINF:-1,Fine', (), "http://h/ADULT/1") == "adult"
+    assert f.match_fields('#EXTINF:-1,Fine', (), "http://h/1") is None
+
+def test_longest_rule_wins_at_same_position():
+    f = ContentFilter(["porn", "pornhub"])
+    assert f.match(Entry("#EXTINF:-1,PornHub Live", url="http://h/1")) == "pornhub"
+
+def test_no_rules_matches_nothing():
+    assert ContentFilter([]).match_fields("#EXTINF:-1,anything", (), "http://h/") is None
+
+def test_version_follows_rules_not_order():
+    assert ContentFilter(["a", "b"]).version == ContentFilter(["b", "a", "a"]).version
+    assert ContentFilter(["a"]).version != ContentFilter(["a", "b"]).version
+
+def test_partition():
+    f = ContentFilter(["xxx"])
+    clean_entry = Entry("#EXTINF:-1,News", url="http://h/1")
+    bad_entry = Entry("#EXTINF:-1,XXX", url="http://h/2")
+    clean, removed = f.partition([clean_entry, bad_entry])
+    assert clean == [clean_entry]
+    assert removed == [(bad_entry, "xxx")]
+    assert rule_counts(removed) == {"xxx": 1}
+
+def test_load_rules_skips_comments_and_blanks(tmp_path):
+    path = tmp_path / "rules.txt"
+    path.write_text("# comment\n\n  XXX \nadult\n", encoding="utf-8")
+    assert load_rules(str(path)) == ["xxx", "adult"]
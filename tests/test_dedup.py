@@ -0,0 +1,48 @@
+from dedup import DedupIndex, canonical_key, canonical_url, dedupe_runs, source_ranker
+from m3u_parser import Entry
+
+def entry(url, logo="", title="CNN", group="News"):
+    logo_attr = f' tvg-logo="{logo}"' if logo else ""
+    return Entry(f'#EXTINF:-1 tvg-id="cnn.us"{logo_attr} group-title="{group}",{title}', url=url)
+
+def test_canonical_url():
+    assert canonical_url("HTTPS://Host.COM:443/a.m3u8#frag") == "https://host.com/a.m3u8"
+    assert canonical_url("http://h:80") == "http://h/"
+    assert canonical_url("http://h/a|b=2&a=1") == "http://h/a|a=1&b=2"
+
+def test_canonical_key_ignores_cosmetics_and_whitespace():
+    a = Entry('#EXTINF:-1 tvg-id="x" tvg-logo="one" group-title="G",Some  Channel', url="http://h/a")
+    b = Entry('#EXTINF:-1 group-title="G" tvg-logo="two" tvg-id="x",some channel', url="HTTP://H/a")
+    assert canonical_key(a) == canonical_key(b)
+    c = Entry('#EXTINF:-1 tvg-id="y" group-title="G",Some Channel', url="http://h/a")
+    assert canonical_key(a) != canonical_key(c)
+
+def test_lower_rank_wins():
+    low, high = entry("http://h/1", logo="low"), entry("http://h/1", logo="high")
+    [kept_high, kept_low], _ = dedupe_runs([[high], [low]], [1, 0])
+    assert kept_low == [low]
+    assert kept_high == []
+
+def test_tie_keeps_first_seen():
+    first, second = entry("http://h/1", logo="a"), entry("http://h/1", logo="b")
+    kept, index = dedupe_runs([[first], [second]], [0, 0])
+    assert kept == [[first], []]
+    assert index.removed == 1
+    assert index.seen == 2
+
+def test_several_orders_in_one_pass():
+    a, b = entry("http://h/1", logo="a"), entry("http://h/1", logo="b")
+    index = DedupIndex(orders=2)
+    index.add_run([a], (0, 1))
+    index.add_run([b], (1, 0))
+    assert index.winners(0) == {a}
+    assert index.winners(1) == {b}
+    # Each entry wins under some order, so neither is dropped
+    assert index.filter_runs([[a], [b]]) == [[a], [b]]
+    assert index.removed == 0
+
+def test_source_ranker():
+    rank = source_ranker(["u/one", "u/two", "u/three"], preferred=["three"])
+    assert rank("u/three") == 0
+    assert rank("u/one") < rank("u/two")
+    assert rank("u/unknown") > rank("u/two")
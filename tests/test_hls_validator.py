@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import hls_validator
+from hls_validator import (DEAD, DENIED, GEO_BLOCKED, LIVE, TOKEN_EXPIRED, HlsResult,
+                           classify_denied, parse_playlist_text, token_expiry)
+
+PAST = int(time.time()) - 3600
+FUTURE = int(time.time()) + 3600
+
+def test_token_expiry_from_query_and_path():
+    assert token_expiry(f"https://h/a.m3u8?token=abc&expires={FUTURE}") == FUTURE
+    assert token_expiry(f"https://h/a.m3u8?E={FUTURE}") == FUTURE
+    assert token_expiry(f"https://h/a.m3u8?exp={FUTURE * 1000}") == FUTURE
+    assert token_expiry(f"https://h/exp={FUTURE}/a.m3u8") == FUTURE
+    assert token_expiry(f"https://h/expires/{FUTURE}/a.m3u8") == FUTURE
+    assert token_expiry("https://h/a.m3u8?token=abc") is None
+
+def test_classify_geo_block():
+    assert classify_denied("https://h/a.m3u8", 451) == GEO_BLOCKED
+    assert classify_denied("https://h/a.m3u8", 403, "Not available in your country") == GEO_BLOCKED
+    assert classify_denied("https://h/a.m3u8", 403, "geo-restricted content") == GEO_BLOCKED
+
+def test_geo_hints_are_whole_words():
+    assert classify_denied("https://h/a.m3u8", 403, "Georgia Public Broadcasting") == DENIED
+    assert classify_denied("https://h/a.m3u8", 403, "regional sports network") == DENIED
+
+def test_classify_token_expiry():
+    assert classify_denied(f"https://h/a.m3u8?expires={PAST}", 403) == TOKEN_EXPIRED
+    assert classify_denied("https://h/a.m3u8", 410) == TOKEN_EXPIRED
+    assert classify_denied("https://h/a.m3u8", 403, "Token expired") == TOKEN_EXPIRED
+
+def test_signed_url_denied_before_expiry_is_not_token_expired():
+    assert classify_denied(f"https://h/a.m3u8?expires={FUTURE}", 403) == DENIED
+    assert classify_denied("https://h/a.m3u8?token=abc", 401) == DENIED
+
+def result(status=DEAD, http_status=None, network_error=False, detail=""):
+    r = HlsResult("https://h/a.m3u8")
+    r.status = status
+    r.http_status = http_status
+    r.network_error = network_error
+    r.detail = detail
+    return r
+
+def test_host_failed():
+    assert result(network_error=True).host_failed
+    assert result(http_status=429).host_failed
+    assert result(http_status=503).host_failed
+    assert not result(http_status=404).host_failed
+    assert not result(http_status=200, detail="not an HLS playlist").host_failed
+    assert not result(DENIED, http_status=403).host_failed
+    assert not result(LIVE, http_status=200).host_failed
+
+def test_parse_master_and_media_playlists():
+    master = "#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=800000\nlow.m3u8\n#EXT-X-STREAM-INF:BANDWIDTH=3000000\nhttps://o/high.m3u8\n"
+    assert parse_playlist_text(master, "https://h/live/index.m3u8") == (
+        "master", [(800000, "https://h/live/low.m3u8"), (3000000, "https://o/high.m3u8")])
+    media = "#EXTM3U\n#EXTINF:6,\nseg1.ts\n#EXTINF:6,\nseg2.ts\n"
+    assert parse_playlist_text(media, "https://h/live/low.m3u8") == (
+        "media", ["https://h/live/seg1.ts", "https://h/live/seg2.ts"])
+
+def test_rank_results_remeasures_only_untimed(monkeypatch):
+    calls = []
+
+    async def fake_validate(url, headers=None, session=None, cache=None):
+        calls.append(url)
+        r = HlsResult(url)
+        r.status = LIVE
+        r.manifest_ms = 50
+        return r
+
+    monkeypatch.setattr(hls_validator, "validate", fake_validate)
+    slow = result(LIVE)
+    slow.url, slow.manifest_ms = "https://h/slow.m3u8", 300
+    dead = result(DEAD)
+    dead.url = "https://h/dead.m3u8"
+    cached = result(LIVE, detail="cached")
+    cached.url = "https://h/cached.m3u8"
+
+    ranked = asyncio.run(hls_validator.rank_results([slow, dead, cached]))
+    assert calls == ["https://h/cached.m3u8"]
+    assert [r.url for r in ranked] == ["https://h/cached.m3u8", "https://h/slow.m3u8", "https://h/dead.m3u8"]
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+import host_scheduler
+from host_scheduler import MAX_RATE, MIN_RATE, CircuitBreaker, CircuitOpenError, HostScheduler, TokenBucket
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(host_scheduler.time, "monotonic", c)
+    return c
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(threshold=3, reset_after=60)
+    for _ in range(2):
+        breaker.record(False)
+    assert breaker.allow()
+    breaker.record(False)
+    assert not breaker.allow()
+    clock.now += 59
+    assert not breaker.allow()
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(threshold=2, reset_after=60)
+    breaker.record(False)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.allow()
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(threshold=1, reset_after=60)
+    breaker.record(False)
+    clock.now += 60
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert not breaker.allow()
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(threshold=1, reset_after=60)
+    breaker.record(False)
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record(False)
+    assert not breaker.allow()
+    clock.now += 60
+    assert breaker.allow()
+
+def test_successful_probe_closes(clock):
+    breaker = CircuitBreaker(threshold=1, reset_after=60)
+    breaker.record(False)
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.allow()
+    assert breaker.allow()
+
+def test_lost_probe_stops_blocking_after_another_cool_down(clock):
+    breaker = CircuitBreaker(threshold=1, reset_after=60)
+    breaker.record(False)
+    clock.now += 60
+    assert breaker.allow()
+    clock.now += 59
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+def test_bucket_rate_adapts_within_bounds():
+    bucket = TokenBucket(rate=1.0)
+    bucket.adapt(False)
+    assert bucket.rate == 0.5
+    for _ in range(10):
+        bucket.adapt(False)
+    assert bucket.rate == MIN_RATE
+    for _ in range(100):
+        bucket.adapt(True)
+    assert bucket.rate == MAX_RATE
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(HostScheduler, "backoff", staticmethod(lambda attempt: 0))
+    return HostScheduler(rate=1000, burst=1000, failure_threshold=2, reset_after=60)
+
+def test_run_retries_then_raises_and_opens_circuit(scheduler):
+    calls = []
+
+    async def op():
+        calls.append(1)
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(scheduler.run("https://h/a", op, retries=1))
+    assert len(calls) == 2
+    assert scheduler.stats["h"]["retried"] == 1
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(scheduler.run("https://h/b", op))
+    assert len(calls) == 2
+    assert scheduler.stats["h"]["short-circuited"] == 1
+
+def test_run_counts_failed_results_without_retrying(scheduler):
+    async def op():
+        return 503
+
+    assert asyncio.run(scheduler.run("https://h/a", op, failed=lambda status: status >= 500)) == 503
+    assert scheduler.stats["h"]["failed"] == 1
+    assert "retried" not in scheduler.stats["h"]
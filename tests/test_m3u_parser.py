@@ -0,0 +1,56 @@
+from m3u_parser import Entry, iter_entries, parse_extinf
+
+def test_attrs_duration_and_title():
+    duration, attrs, title = parse_extinf('#EXTINF:-1 tvg-id="abc.us" group-title="News",ABC News')
+    assert duration == "-1"
+    assert attrs == {"tvg-id": "abc.us", "group-title": "News"}
+    assert title == "ABC News"
+
+def test_comma_inside_quotes_stays_in_attribute():
+    _, attrs, title = parse_extinf('#EXTINF:-1 tvg-id="a,b" tvg-name="Fox, Sports" group-title="Sports",Fox Sports 1')
+    assert attrs["tvg-id"] == "a,b"
+    assert attrs["tvg-name"] == "Fox, Sports"
+    assert title == "Fox Sports 1"
+
+def test_comma_in_title_kept():
+    _, _, title = parse_extinf('#EXTINF:-1 group-title="Movies",Crouching Tiger, Hidden Dragon')
+    assert title == "Crouching Tiger, Hidden Dragon"
+
+def test_no_comma_gives_empty_title():
+    duration, attrs, title = parse_extinf('#EXTINF:-1 group-title="News"')
+    assert duration == "-1"
+    assert attrs == {"group-title": "News"}
+    assert title == ""
+
+def test_unclosed_quote_falls_back_to_whole_line_group_title():
+    line = ('#EXTINF:-1 tvg-id="CTV.(CKY).Winnipeg group-title="AriaPlus - Canada",.MB.ca" '
+            'tvg-logo="http://logo/ctv.png",CTV Winnipeg')
+    _, attrs, _ = parse_extinf(line)
+    assert Entry(line, url="http://s/1").group_title == "AriaPlus - Canada"
+    assert attrs["group-title"] == "AriaPlus - Canada"
+
+def test_iter_entries_headers_and_skips():
+    skipped = []
+    source = "\n".join([
+        "#EXTM3U",
+        '#EXTINF:-1 group-title="A",One',
+        "#EXTVLCOPT:http-referrer=https://site/",
+        "",
+        "http://s/1",
+        '#EXTINF:-1 group-title="A",Orphan',
+        '#EXTINF:-1 group-title="B",Two',
+        "http://s/2",
+    ])
+    entries = list(iter_entries(source, on_skip=skipped.append))
+    assert [e.title for e in entries] == ["One", "Two"]
+    assert entries[0].vlcopts == {"http-referrer": "https://site/"}
+    assert skipped == ['#EXTINF:-1 group-title="A",Orphan']
+
+def test_record_round_trip_keeps_rule():
+    entry = Entry('#EXTINF:-1 group-title="A",One', ["#EXTVLCOPT:x=y"], "http://s/1")
+    entry.rule = "xxx"
+    restored = Entry.from_record(entry.to_record())
+    assert restored == entry
+    assert restored.attrs == entry.attrs
+    assert restored.rule == "xxx"
+    assert Entry.from_record(Entry("#EXTINF:-1,Two", url="http://s/2").to_record()).rule is None
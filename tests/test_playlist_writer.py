@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from m3u_parser import Entry
+from playlist_writer import PlaylistWriter, merge_sorted_runs, sort_run, write_sorted_runs
+
+def entry(title, group, url):
+    return Entry(f'#EXTINF:-1 group-title="{group}",{title}', url=url)
+
+def test_merge_sorted_runs_orders_and_drops_exact_duplicates():
+    a = sort_run([entry("Zed", "News", "http://h/z"), entry("Abc", "News", "http://h/a")])
+    b = sort_run([entry("abc", "Movies", "http://h/m"), entry("Abc", "News", "http://h/a")])
+    merged = list(merge_sorted_runs([a, b]))
+    assert [(e.group_title, e.title) for e in merged] == [("Movies", "abc"), ("News", "Abc"), ("News", "Zed")]
+
+def test_grouped_output(tmp_path):
+    path = tmp_path / "out.m3u8"
+    runs = [[entry("One", "A", "http://h/1")], [entry("Two", "", "http://h/2")]]
+    writer = write_sorted_runs(str(path), ["#EXTM3U"], runs)
+    assert writer.count == 2
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        "#EXTM3U",
+        "",
+        "#EXTGRP:A",
+        '#EXTINF:-1 group-title="A",One',
+        "http://h/1",
+        "",
+        "#EXTGRP:Other",
+        '#EXTINF:-1 group-title="",Two',
+        "http://h/2",
+    ]
+
+def test_flat_output_with_comment(tmp_path):
+    path = tmp_path / "removed.m3u8"
+    with PlaylistWriter(str(path), ["#EXTM3U"], grouped=False) as writer:
+        writer.write(entry("One", "A", "http://h/1"), comment="Removed by rule: xxx")
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        "#EXTM3U",
+        "# Removed by rule: xxx",
+        '#EXTINF:-1 group-title="A",One',
+        "http://h/1",
+        "",
+    ]
+
+def test_target_untouched_until_close(tmp_path):
+    path = tmp_path / "out.m3u8"
+    path.write_text("old\n", encoding="utf-8")
+    writer = PlaylistWriter(str(path), ["#EXTM3U"])
+    writer.write(entry("One", "A", "http://h/1"))
+    assert path.read_text(encoding="utf-8") == "old\n"
+    writer.close()
+    assert path.read_text(encoding="utf-8").startswith("#EXTM3U\n")
+    assert os.listdir(tmp_path) == ["out.m3u8"]
+
+def test_exception_aborts_and_keeps_old_file(tmp_path):
+    path = tmp_path / "out.m3u8"
+    path.write_text("old\n", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with PlaylistWriter(str(path), ["#EXTM3U"]) as writer:
+            writer.write(entry("One", "A", "http://h/1"))
+            raise RuntimeError("boom")
+    assert path.read_text(encoding="utf-8") == "old\n"
+    assert os.listdir(tmp_path) == ["out.m3u8"]
@@ -0,0 +1,85 @@
+import asyncio
+
+from route_policy import RoutePolicy
+
+class Page:
+    pass
+
+class Frame:
+    def __init__(self, page, parent_frame=None):
+        self.page = page
+        self.parent_frame = parent_frame
+
+class Request:
+    def __init__(self, url, resource_type, frame, navigation=False):
+        self.url = url
+        self.resource_type = resource_type
+        self.frame = frame
+        self.navigation = navigation
+
+    def is_navigation_request(self):
+        return self.navigation
+
+class Route:
+    def __init__(self, request):
+        self.request = request
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "abort"
+
+    async def continue_(self):
+        self.outcome = "continue"
+
+def route(policy, url, resource_type, frame, navigation=False):
+    r = Route(Request(url, resource_type, frame, navigation))
+    asyncio.run(policy._route(r))
+    return r.outcome
+
+def test_heavy_types_and_ad_hosts_blocked():
+    policy = RoutePolicy("test")
+    assert policy.block_reason("https://site/logo.png", "image") == "image"
+    assert policy.block_reason("https://site/font.woff2", "font") == "font"
+    assert policy.block_reason("https://securepubads.g.doubleclick.net/x.js", "script") == "ad/tracker"
+    assert policy.block_reason("https://site/player.js", "script") is None
+    assert policy.block_reason("https://site/live/index.m3u8", "fetch") is None
+
+def test_allow_lists():
+    policy = RoutePolicy("test", allow_types=["image"], allow_hosts=["doubleclick.net"])
+    assert policy.block_reason("https://site/logo.png", "image") is None
+    assert policy.block_reason("https://ad.doubleclick.net/x.js", "script") is None
+
+def test_media_and_segments_only_blocked_after_manifest():
+    policy = RoutePolicy("test")
+    assert policy.block_reason("https://cdn/seg1.ts", "fetch") is None
+    assert policy.block_reason("https://cdn/probe.mp4", "media") is None
+    assert policy.block_reason("https://cdn/seg1.ts", "fetch", manifest_seen=True) == "segment"
+    assert policy.block_reason("https://cdn/probe", "media", manifest_seen=True) == "media"
+    assert policy.block_reason("https://cdn/live.m3u8", "fetch", manifest_seen=True) is None
+
+def test_manifest_watch_is_per_page_and_reset_by_navigation():
+    policy = RoutePolicy("test")
+    page, other = Page(), Page()
+    main, other_main = Frame(page), Frame(other)
+    assert route(policy, "https://cdn/seg1.ts", "fetch", main) == "continue"
+    assert route(policy, "https://cdn/live/index.m3u8", "fetch", Frame(page, parent_frame=main)) == "continue"
+    assert route(policy, "https://cdn/seg1.ts", "fetch", main) == "abort"
+    assert route(policy, "https://cdn/seg1.ts", "fetch", other_main) == "continue"
+    assert route(policy, "https://site/next", "document", main, navigation=True) == "continue"
+    assert route(policy, "https://cdn/seg1.ts", "fetch", main) == "continue"
+    assert policy.blocked == {"segment": 1}
+
+def test_requests_without_a_frame_are_not_gated():
+    class Orphan(Request):
+        @property
+        def frame(self):
+            raise RuntimeError("service worker")
+
+        @frame.setter
+        def frame(self, value):
+            pass
+
+    policy = RoutePolicy("test")
+    r = Route(Orphan("https://cdn/seg1.ts", "fetch", None))
+    asyncio.run(policy._route(r))
+    assert r.outcome == "continue"
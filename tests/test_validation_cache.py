@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from dedup import canonical_url
+from validation_cache import PROBE, TRANSIENT_TTL, TTLS, ValidationCache
+
+@pytest.fixture
+def cache(tmp_path):
+    c = ValidationCache(str(tmp_path / "validation.sqlite3"))
+    yield c
+    c.db.close()
+
+def ttl(cache, url, namespace=""):
+    checked, expires = cache.db.execute(
+        "SELECT checked, expires FROM validations WHERE url = ?", (namespace + canonical_url(url),)
+    ).fetchone()
+    return round(expires - checked)
+
+def test_ttl_by_status(cache):
+    for status, seconds in TTLS.items():
+        url = f"https://h/{status}.m3u8"
+        cache.put(url, status)
+        assert cache.get(url) == status
+        assert ttl(cache, url) == seconds
+
+def test_transient_failures_get_short_ttl(cache):
+    cache.put("https://h/a.m3u8", "dead", 503, transient=True)
+    assert ttl(cache, "https://h/a.m3u8") == TRANSIENT_TTL
+
+def test_ttl_capped_at_token_expiry(cache):
+    url = f"https://h/a.m3u8?expires={int(time.time()) + 60}"
+    cache.put(url, "live", 200)
+    assert cache.get(url) == "live"
+    assert ttl(cache, url) <= 60
+
+def test_expired_token_not_served(cache):
+    url = f"https://h/a.m3u8?expires={int(time.time()) - 1}"
+    cache.put(url, "live", 200)
+    assert cache.get(url) is None
+
+def test_keyed_by_canonical_url(cache):
+    cache.put("HTTPS://H:443/a.m3u8#x", "live")
+    assert cache.get("https://h/a.m3u8") == "live"
+
+def test_probe_namespace_kept_apart(cache):
+    cache.put("https://h/a.m3u8", "live", 200, namespace=PROBE)
+    assert cache.get("https://h/a.m3u8") is None
+    assert cache.get("https://h/a.m3u8", namespace=PROBE) == "live"
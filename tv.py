@@ -1,12 +1,47 @@
-import asyncio
+import json
+import os
+import re
+import time
 import urllib.parse
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from playwright.async_api import async_playwright
 
+import browser_service
+import hls_validator
+import host_scheduler
+import http_client
+import m3u8_capture
+from m3u_parser import iter_entries, parse_extinf
+from page_pool import PagePool, concurrency_from_env
+from route_policy import RoutePolicy
+from storage_state import StorageState
+
 M3U8_FILE = "TheTVApp.m3u8"
 BASE_URL = "https://thetvapp.to"
 CHANNEL_LIST_URL = f"{BASE_URL}/tv"
 
+QUALITIES = ["SD", "HD"]
+# Seconds to wait for a channel's manifest after the page loads
+TV_DEADLINE = 8
+ROUTES = RoutePolicy("TheTVApp")
+STATE = StorageState("TheTVApp")
+# Channel pages captured in parallel
+TV_CONCURRENCY = concurrency_from_env("TV_CONCURRENCY")
+# The /tv listing order and per-href slot URLs and token expiry from the last run
+STATE_FILE = os.path.join(".cache", "thetvapp_tokens.json")
+# A channel is re-scraped once its token has less than this many seconds
+# left; keep it above the workflow interval so nothing lapses between runs
+REFRESH_WINDOW = int(os.environ.get("TV_REFRESH_WINDOW", 90 * 60))
+# Run counter and last run each appended (group, title, url) was scraped
+SEEN_FILE = os.path.join(".cache", "thetvapp_seen.json")
+# Appended entries not scraped for this many runs are dropped
+STALE_AFTER_RUNS = int(os.environ.get("TV_STALE_AFTER_RUNS", 24))
+# Event titles end in "- 8/23/25, 4:00:00 PM UTC"; drop them this long after kick-off
+EVENT_DATE_RE = re.compile(r"(\d{1,2}/\d{1,2}/\d{2}), (\d{1,2}:\d{2}:\d{2} [AP]M) UTC\s*$")
+EVENT_GRACE = timedelta(hours=6)
+
 SECTIONS_TO_APPEND = {
     "/nba": "NBA",
     "/mlb": "MLB",
@@ -30,123 +65,209 @@ def extract_real_m3u8(url: str):
         return url
     return None
 
-async def scrape_tv_urls():
-    urls = []
-    async with async_playwright() as p:
-        browser = await p.firefox.launch(headless=True)
-        context = await browser.new_context()
-        page = await context.new_page()
+def load_stream_button(quality):
+    async def load_stream(page):
+        await page.get_by_text(f"Load {quality} Stream", exact=True).click(timeout=5000)
+    return load_stream
+
+async def capture_channel(page, url, goto_timeout=30000):
+    """
+    Load a channel page once and press its Load <quality> Stream buttons in
+    turn, returning {quality: real m3u8} for the qualities that played.
+    """
+    found = {}
+    async with m3u8_capture.ManifestCapture(page, extract=extract_real_m3u8) as capture:
+        await host_scheduler.get_scheduler().goto(page, url, timeout=goto_timeout, wait_until="domcontentloaded")
+        for quality in QUALITIES:
+            seen = len(capture.urls)
+            capture.expect()
+            urls = await capture.escalate(
+                steps=(load_stream_button(quality), *m3u8_capture.ESCALATION),
+                deadline=TV_DEADLINE,
+                patience=0,
+            )
+            if len(urls) > seen:
+                found[quality] = urls[seen]
+                print(f"✅ {quality}: {urls[seen]}")
+            else:
+                print(f"❌ {quality} not found")
+    return found
 
-        print(f"🔄 Loading /tv channel list...")
-        await page.goto(CHANNEL_LIST_URL, timeout=60000)
-        links = await page.locator("ol.list-group a").all()
-        hrefs = [await link.get_attribute("href") for link in links if await link.get_attribute("href")]
+async def list_channels(context, url):
+    """(href, title) for every channel link on a listing page."""
+    page = await context.new_page()
+    try:
+        await host_scheduler.get_scheduler().goto(page, url, timeout=60000)
+        channels = []
+        for link in await page.locator("ol.list-group a").all():
+            href = await link.get_attribute("href")
+            title_raw = await link.text_content() or ""
+            if href:
+                title = " - ".join(line.strip() for line in title_raw.splitlines() if line.strip())
+                channels.append((href, title))
+        return channels
+    finally:
         await page.close()
 
-        for href in hrefs:
+def stream_headers(page_url):
+    """Referer/Origin the player sends for streams on page_url; the CDN checks them."""
+    parts = urllib.parse.urlsplit(page_url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    return {"Referer": origin + "/", "Origin": origin}
+
+async def rank_streams(found, page_url):
+    """Time a channel's captured {quality: url} streams; HlsResults fastest first."""
+    ranked = await hls_validator.rank(list(found.values()), stream_headers(page_url)) if found else []
+    for result in ranked:
+        print(f"🏁 {result.total_ms}ms ({result.status}): {result.url}")
+    return ranked
+
+async def pick_tv_slots(found, page_url):
+    """
+    URLs for a channel's SD and HD slots, in that order. A slot whose own
+    stream is missing or failing takes the fastest working one instead;
+    None means nothing was captured and the existing URL should stay.
+    """
+    working = [r.url for r in await rank_streams(found, page_url) if r.ok]
+    slots = []
+    for quality in QUALITIES:
+        url = found.get(quality)
+        if working and url not in working:
+            print(f"🔁 {quality} failing over to {working[0]}")
+            url = working[0]
+        slots.append(url)
+    return slots
+
+def load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp_path, path)
+
+def channel_expiry(urls):
+    """Earliest token expiry of a channel's slot URLs; None if any slot has none."""
+    expiries = [hls_validator.token_expiry(url) if url else None for url in urls]
+    return None if None in expiries else min(expiries)
+
+def due_for_refresh(record, now=None):
+    if not record or record.get("expires") is None:
+        return True
+    return record["expires"] - (now or time.time()) < REFRESH_WINDOW
+
+async def scrape_tv_urls(state, order=None):
+    """
+    List the /tv channels and re-scrape those whose tokens are unknown or
+    expire within REFRESH_WINDOW. When the listing differs from order (last
+    run's), positions no longer line up with slot history, so state is
+    cleared and every channel is refreshed and placed by position. Returns
+    (hrefs in listing order, {href: [SD url, HD url]} for the channels
+    that were scraped).
+    """
+    async with async_playwright() as p:
+        browser = await browser_service.launch(p, headless=True)
+        context = await ROUTES.apply(await browser.new_context(**STATE.context_options()))
+        print(f"🔄 Loading /tv channel list...")
+        hrefs = [href for href, _ in await list_channels(context, CHANNEL_LIST_URL)]
+        await STATE.save(context)
+        await context.close()
+        if hrefs != order:
+            print("📋 /tv listing changed since the last run, refreshing every channel by position")
+            state.clear()
+        due = [href for href in hrefs if due_for_refresh(state.get(href))]
+        print(f"🔑 {len(due)}/{len(hrefs)} channels need fresh tokens "
+              f"(unknown or expiring within {REFRESH_WINDOW // 60} min)")
+
+        async def scrape(page, href):
             full_url = BASE_URL + href
             print(f"🎯 Scraping TV page: {full_url}")
-            for quality in ["SD", "HD"]:
-                stream_url = None
-                new_page = await context.new_page()
-
-                async def handle_response(response):
-                    nonlocal stream_url
-                    real = extract_real_m3u8(response.url)
-                    if real and not stream_url:
-                        stream_url = real
-
-                new_page.on("response", handle_response)
-                await new_page.goto(full_url)
-                try:
-                    await new_page.get_by_text(f"Load {quality} Stream", exact=True).click(timeout=5000)
-                except:
-                    pass
-                await asyncio.sleep(4)
-                await new_page.close()
-
-                if stream_url:
-                    print(f"✅ {quality}: {stream_url}")
-                    urls.append(stream_url)
-                else:
-                    print(f"❌ {quality} not found")
+            return await pick_tv_slots(await capture_channel(page, full_url), full_url)
 
+        print(f"🧵 Scraping {len(due)} channels with {TV_CONCURRENCY} workers")
+        pool = PagePool(browser, TV_CONCURRENCY, setup=ROUTES.apply, teardown=STATE.save, **STATE.context_options())
+        results = await pool.map(due, scrape)
+        await ROUTES.drain()
         await browser.close()
-    return urls
-
-async def scrape_section_urls(context, section_path, group_name):
-    urls = []
-    page = await context.new_page()
-    section_url = BASE_URL + section_path
-    print(f"\n📁 Loading section: {section_url}")
-    await page.goto(section_url, timeout=60000)
-    links = await page.locator("ol.list-group a").all()
-    hrefs_and_titles = []
-
-    for link in links:
-        href = await link.get_attribute("href")
-        title_raw = await link.text_content()
-        if href and title_raw:
-            title = " - ".join(line.strip() for line in title_raw.splitlines() if line.strip())
-            hrefs_and_titles.append((href, title))
-
-    await page.close()
-
-    for href, title in hrefs_and_titles:
-        full_url = BASE_URL + href
-        print(f"🎯 Scraping {group_name}: {title}")
-
-        for quality in ["SD", "HD"]:
-            stream_url = None
-            new_page = await context.new_page()
-
-            async def handle_response(response):
-                nonlocal stream_url
-                real = extract_real_m3u8(response.url)
-                if real and not stream_url:
-                    stream_url = real
-
-            new_page.on("response", handle_response)
-            await new_page.goto(full_url, timeout=60000)
-
-            try:
-                await new_page.get_by_text(f"Load {quality} Stream", exact=True).click(timeout=5000)
-            except:
-                pass
-
-            await asyncio.sleep(4)
-            await new_page.close()
-
-            if stream_url:
-                print(f"✅ {quality}: {stream_url}")
-                urls.append((stream_url, group_name, title))
-            else:
-                print(f"❌ {quality} not found")
 
-    return urls
+    # A channel whose worker failed still gets one (empty) slot per quality
+    return hrefs, {href: slots or [None] * len(QUALITIES) for href, slots in zip(due, results)}
 
 async def scrape_all_append_sections():
-    all_urls = []
     async with async_playwright() as p:
-        browser = await p.firefox.launch(headless=True)
-        context = await browser.new_context()
-
+        browser = await browser_service.launch(p, headless=True)
+        context = await ROUTES.apply(await browser.new_context(**STATE.context_options()))
+        jobs = []
         for section_path, group_name in SECTIONS_TO_APPEND.items():
-            urls = await scrape_section_urls(context, section_path, group_name)
-            all_urls.extend(urls)
-
+            section_url = BASE_URL + section_path
+            print(f"\n📁 Loading section: {section_url}")
+            for href, title in await list_channels(context, section_url):
+                if title:
+                    jobs.append((href, group_name, title))
+        await STATE.save(context)
+        await context.close()
+
+        async def scrape(page, job):
+            href, group_name, title = job
+            print(f"🎯 Scraping {group_name}: {title}")
+            full_url = BASE_URL + href
+            found = await capture_channel(page, full_url, goto_timeout=60000)
+            # Fastest first, so it is the entry players reach before the backup
+            return [(result.url, group_name, title) for result in await rank_streams(found, full_url)]
+
+        print(f"🧵 Scraping {len(jobs)} section entries with {TV_CONCURRENCY} workers")
+        pool = PagePool(browser, TV_CONCURRENCY, setup=ROUTES.apply, teardown=STATE.save, **STATE.context_options())
+        results = await pool.map(jobs, scrape)
+        await ROUTES.drain()
         await browser.close()
-    return all_urls
 
-def replace_urls_in_tv_section(lines, tv_urls):
+    return [entry for entries in results if entries for entry in entries]
+
+def replace_urls_in_tv_section(lines, hrefs, refreshed, state):
+    """
+    Splice refreshed channels into the /tv section (the first
+    len(hrefs) * len(QUALITIES) URL lines). Each slot is found by the URL
+    last written there for its href; only channels with no history fall
+    back to their position in the listing, which is only trusted while the
+    listing matches the last run's (see scrape_tv_urls); a slot that cannot
+    be found is forgotten so the next run places it by position. state is updated with
+    what every refreshed slot now holds and its token expiry.
+    """
+    by_url = defaultdict(list)
+    by_position = {}
+    positions = {href: i for i, href in enumerate(hrefs)}
+    written = {}
+    for href, slots in refreshed.items():
+        previous = state.get(href, {}).get("urls") or [None] * len(QUALITIES)
+        written[href] = [None] * len(QUALITIES)
+        for q in range(len(QUALITIES)):
+            if previous[q]:
+                by_url[previous[q]].append((href, q))
+            else:
+                by_position[positions[href] * len(QUALITIES) + q] = (href, q)
+
     result = []
     url_idx = 0
     for line in lines:
-        if line.strip().startswith("http") and url_idx < len(tv_urls):
-            result.append(tv_urls[url_idx])
+        url = line.strip()
+        if url.startswith("http") and url_idx < len(hrefs) * len(QUALITIES):
+            slot = by_url[url].pop(0) if by_url.get(url) else by_position.get(url_idx)
             url_idx += 1
-        else:
-            result.append(line)
+            if slot:
+                href, q = slot
+                line = refreshed[href][q] or line
+                written[href][q] = line.strip()
+        result.append(line)
+
+    now = int(time.time())
+    for href, urls in written.items():
+        state[href] = {"urls": urls, "expires": channel_expiry(urls), "refreshed": now}
     return result
 
 def append_new_streams(lines, new_urls_with_groups):
@@ -169,20 +290,9 @@ def append_new_streams(lines, new_urls_with_groups):
     lines = cleaned_lines
 
     existing_entries = {}
-    i = 0
-    while i < len(lines) - 1:
-        if lines[i].startswith("#EXTINF:-1"):
-            line = lines[i]
-            group = None
-            title = line.split(",")[-1].strip()
-            if 'group-title="' in line:
-                group = line.split('group-title="')[1].split('"')[0]
-            if group:
-                url = lines[i + 1]
-                if (group, title) not in existing_entries:
-                    existing_entries[(group, title)] = set()
-                existing_entries[(group, title)].add(url)
-        i += 1
+    for entry in iter_entries(lines):
+        if entry.group_title:
+            existing_entries.setdefault((entry.group_title, entry.title), set()).add(entry.url)
 
     new_entries_added = {}
 
@@ -216,6 +326,69 @@ def append_new_streams(lines, new_urls_with_groups):
 
     return lines
 
+def event_start(title):
+    m = EVENT_DATE_RE.search(title)
+    if not m:
+        return None
+    try:
+        start = datetime.strptime(f"{m.group(1)} {m.group(2)}", "%m/%d/%y %I:%M:%S %p")
+    except ValueError:
+        return None
+    return start.replace(tzinfo=timezone.utc)
+
+def compact_stale_entries(lines, new_urls_with_groups, index, now=None):
+    """
+    Drop appended section entries that are exact duplicates, whose event
+    started more than EVENT_GRACE ago, or that have not been scraped for
+    STALE_AFTER_RUNS runs. index holds the run counter and the last run
+    each (group, title, url) was seen and is updated in place; entries it
+    has never seen start their count now. The /tv section is untouched.
+    """
+    now = now or datetime.now(timezone.utc)
+    run = index.get("run", 0) + 1
+    last_seen = index.get("entries", {})
+    scraped = {"\t".join((group, title, url)) for url, group, title in new_urls_with_groups}
+    sections = set(SECTIONS_TO_APPEND.values())
+
+    kept = []
+    current = {}
+    dropped = Counter()
+    reclaimed = 0
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("#EXTINF") and i + 1 < len(lines) and not lines[i + 1].startswith("#"):
+            _, attrs, title = parse_extinf(line)
+            group = attrs.get("group-title", "")
+            if group in sections:
+                url = lines[i + 1].strip()
+                key = "\t".join((group, title, url))
+                seen = run if key in scraped else last_seen.get(key, run)
+                start = event_start(title)
+                if key in current:
+                    reason = "duplicate"
+                elif start and start + EVENT_GRACE < now:
+                    reason = "past"
+                elif run - seen >= STALE_AFTER_RUNS:
+                    reason = "unseen"
+                else:
+                    reason = None
+                    current[key] = seen
+                if reason:
+                    dropped[reason] += 1
+                    reclaimed += len(line.encode("utf-8")) + len(lines[i + 1].encode("utf-8")) + 2
+                    i += 2
+                    continue
+        kept.append(line)
+        i += 1
+
+    index["run"] = run
+    index["entries"] = current
+    detail = ", ".join(f"{count} {reason}" for reason, count in dropped.most_common())
+    print(f"🧹 Compacted sections: dropped {sum(dropped.values())} entries"
+          + (f" ({detail})" if detail else "") + f", reclaimed {reclaimed / 1024:.0f} KB")
+    return kept
+
 async def main():
     if not Path(M3U8_FILE).exists():
         print(f"❌ File not found: {M3U8_FILE}")
@@ -225,22 +398,33 @@ async def main():
         lines = f.read().splitlines()
 
     print("🔧 Replacing only /tv stream URLs...")
-    tv_new_urls = await scrape_tv_urls()
-    if not tv_new_urls:
+    saved = load_json(STATE_FILE)
+    state = saved.get("channels", {})
+    hrefs, refreshed = await scrape_tv_urls(state, saved.get("order"))
+    if refreshed and not any(any(slots) for slots in refreshed.values()):
         print("❌ No TV URLs scraped.")
         return
 
-    updated_lines = replace_urls_in_tv_section(lines, tv_new_urls)
+    updated_lines = replace_urls_in_tv_section(lines, hrefs, refreshed, state)
 
     print("\n📦 Scraping all other sections (NBA, NFL, Events, MLB, PPV, etc)...")
     append_new_urls = await scrape_all_append_sections()
     if append_new_urls:
         updated_lines = append_new_streams(updated_lines, append_new_urls)
 
+    seen_index = load_json(SEEN_FILE)
+    updated_lines = compact_stale_entries(updated_lines, append_new_urls, seen_index)
+
     with open(M3U8_FILE, "w", encoding="utf-8") as f:
         f.write("\n".join(updated_lines))
+    save_json(STATE_FILE, {"order": hrefs, "channels": {href: state[href] for href in hrefs if href in state}})
+    save_json(SEEN_FILE, seen_index)
 
     print(f"\n✅ {M3U8_FILE} updated: Clean top, no duplicates, proper MLB, NFL, and PPV logos.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        http_client.run(main())
+    finally:
+        host_scheduler.get_scheduler().report()
+        ROUTES.report()
@@ -2,6 +2,9 @@ import requests
 import re
 from datetime import datetime, timedelta
 
+from m3u_parser import iter_entries
+from upstream import upstream_url
+
 UPSTREAM_URL = "http://tvpass.org/playlist/m3u"
 LOCAL_FILE = "TVPass.m3u"
 
@@ -58,21 +61,12 @@ def is_event_outdated(title):
     return False  # Keep if no date found
 
 def fetch_upstream_pairs():
-    res = requests.get(UPSTREAM_URL, timeout=15)
+    res = requests.get(upstream_url(UPSTREAM_URL), timeout=15)
     res.raise_for_status()
-    lines = res.text.splitlines()
     pairs = []
-    i = 0
-    while i < len(lines):
-        if lines[i].startswith("#EXTINF"):
-            meta = lines[i].strip()
-            i += 1
-            if i < len(lines):
-                url = lines[i].strip()
-                title = extract_title(meta)
-                if not is_event_outdated(title):
-                    pairs.append((meta, url))
-        i += 1
+    for entry in iter_entries(res.text):
+        if not is_event_outdated(extract_title(entry.extinf)):
+            pairs.append((entry.extinf, entry.url))
     return pairs
 
 def parse_local_playlist():
@@ -81,17 +75,9 @@ def parse_local_playlist():
 
     header = lines[0] if lines and lines[0].startswith("#EXTM3U") else "#EXTM3U"
     pairs = []
-    i = 1
-    while i < len(lines):
-        if lines[i].startswith("#EXTINF"):
-            meta = lines[i].strip()
-            i += 1
-            if i < len(lines):
-                url = lines[i].strip()
-                title = extract_title(meta)
-                if not is_event_outdated(title):
-                    pairs.append((meta, url))
-        i += 1
+    for entry in iter_entries(lines[1:]):
+        if not is_event_outdated(extract_title(entry.extinf)):
+            pairs.append((entry.extinf, entry.url))
     return header, pairs
 
 def extract_title(extinf_line):
@@ -2,6 +2,8 @@ import requests
 import re
 from datetime import datetime
 
+from upstream import upstream_url
+
 UPSTREAM_URL = "https://tinyurl.com/DrewUDPTV"
 EPG_URL = "http://drewlive24.duckdns.org:8081/merged2_epg.xml.gz"
 OUTPUT_FILE = "UDPTV.m3u"
@@ -16,7 +18,7 @@ TIMESTAMP_PATTERNS = [
 ]
 
 def fetch_playlist():
-    res = requests.get(UPSTREAM_URL, timeout=15)
+    res = requests.get(upstream_url(UPSTREAM_URL), timeout=15)
     res.raise_for_status()
     return res.text.strip().splitlines()
 
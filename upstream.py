@@ -0,0 +1,26 @@
+import os
+from urllib.parse import urlsplit
+
+# Set to a replay server's address (e.g. http://127.0.0.1:8765) to send every
+# upstream request there instead of the internet.
+UPSTREAM_ENV = "DREWLIVE_UPSTREAM"
+
+def upstream_url(url):
+    """
+    Return url unchanged, or rewritten onto $DREWLIVE_UPSTREAM as
+    {base}/{scheme}/{host}{path}?{query} so the replay server can recover
+    the original URL.
+    """
+    base = os.environ.get(UPSTREAM_ENV)
+    if not base:
+        return url
+    parts = urlsplit(url)
+    rewritten = f"{base.rstrip('/')}/{parts.scheme}/{parts.netloc}{parts.path or '/'}"
+    if parts.query:
+        rewritten += "?" + parts.query
+    return rewritten
+
+def original_url(path):
+    """Inverse of upstream_url for the path part of a rewritten request."""
+    scheme, _, rest = path.lstrip("/").partition("/")
+    return f"{scheme}://{rest}"
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import time
+
+from dedup import canonical_url
+from hls_validator import token_expiry
+
+CACHE_PATH = os.path.join(".cache", "validation.sqlite3")
+MAX_ENTRIES = 50000
+# Seconds a validation outcome is trusted: healthy streams for two scraper
+# cycles, failures only briefly so a recovered stream is picked up again.
+TTLS = {
+    "live": 12 * 3600,
+    "geo-blocked": 3600,
+    "denied": 1800,
+    "dead": 1800,
+    "token-expired": 600,
+}
+DEFAULT_TTL = 600
+# Failures the host may recover from right away (timeouts, resets, 429, 5xx)
+# are only remembered for a moment; "dead" is for definitive answers
+TRANSIENT_TTL = 120
+# Key prefix for prober outcomes: a bare status < 400 probe must never be
+# mistaken for a full HLS validation, nor the other way round
+PROBE = "probe:"
+
+_cache = None
+
+class ValidationCache:
+    """
+    SQLite store of validation outcomes keyed by canonical URL, optionally
+    prefixed with a namespace such as PROBE. Entries expire after an
+    outcome-dependent TTL, capped at a signed URL's own token expiry, and
+    the least recently used rows are evicted once the table grows past
+    max_entries.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS validations ("
+            " url TEXT PRIMARY KEY, status TEXT NOT NULL, http_status INTEGER,"
+            " checked REAL NOT NULL, expires REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS validations_last_used ON validations (last_used)")
+
+    def get(self, url, namespace=""):
+        """Return the cached status for url if it has not expired, else None."""
+        key = namespace + canonical_url(url)
+        now = time.time()
+        row = self.db.execute(
+            "SELECT status FROM validations WHERE url = ? AND expires > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute("UPDATE validations SET last_used = ? WHERE url = ?", (now, key))
+        return row[0]
+
+    def put(self, url, status, http_status=None, namespace="", transient=False):
+        now = time.time()
+        expires = now + (TRANSIENT_TTL if transient else TTLS.get(status, DEFAULT_TTL))
+        token_expires = token_expiry(url)
+        if token_expires is not None:
+            expires = min(expires, token_expires)
+        self.db.execute(
+            "INSERT OR REPLACE INTO validations VALUES (?, ?, ?, ?, ?, ?)",
+            (namespace + canonical_url(url), status, http_status, now, expires, now),
+        )
+
+    def evict(self):
+        """Drop expired rows, then the least recently used beyond max_entries."""
+        now = time.time()
+        expired = self.db.execute("DELETE FROM validations WHERE expires <= ?", (now,)).rowcount
+        overflow = self.db.execute(
+            "DELETE FROM validations WHERE url IN ("
+            " SELECT url FROM validations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        return expired + overflow
+
+    def close(self):
+        evicted = self.evict()
+        self.db.commit()
+        self.db.close()
+        return evicted
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0
+        print(f"🗃️ Validation cache: {self.hits}/{total} hits ({rate:.0f}%)")
+
+def get_cache():
+    """Process-wide cache, opened on first use."""
+    global _cache
+    if _cache is None:
+        _cache = ValidationCache()
+    return _cache
+
+def close_cache():
+    """Persist and report the process-wide cache, if one was opened."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache.report()
+        _cache = None